@@ -0,0 +1,30 @@
+"""
+_env.py — Single-point .env loader.
+
+load_dotenv() used to run once per importing module (config.py,
+close_shorts.py, ...), re-parsing the .env file each time a new entry
+point started up. This module memoizes the load with lru_cache so the
+file is parsed exactly once per process — even across reloads or
+repeated streamlit reruns — and exposes a read-only ENV mapping so
+consumers avoid repeated os.environ lookups.
+"""
+import os
+import types
+from functools import lru_cache
+
+
+@lru_cache(maxsize=1)
+def _load_env():
+    """Parse .env exactly once per process and snapshot the environment.
+
+    Returns a read-only mapping of the environment after .env was applied.
+    lru_cache guarantees the dotenv file I/O + parse happens only on the
+    first call, no matter how many modules import this one.
+    """
+    from dotenv import load_dotenv
+    load_dotenv()
+    return types.MappingProxyType(dict(os.environ))
+
+
+# Consumers read ENV.get("KEY") instead of os.getenv("KEY").
+ENV = _load_env()
@@ -0,0 +1,124 @@
+"""
+_indicators.py — Fused single-pass technical-indicator kernel.
+
+check_portfolio_risks and generate_plan used to run four separate pandas
+rolling computations (ATR, SMA20, SMA50, RSI) over the same OHLC frame,
+each paying its own window dispatch and intermediate Series allocations.
+compute_all walks the arrays once and returns all four scalars.
+
+When numba is installed the loop is JIT-compiled (cache=True, fastmath)
+and auto-vectorized by LLVM; without numba the same function runs as
+plain Python over NumPy arrays — identical results, just slower.
+"""
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):  # No-op decorator when numba is absent
+        def wrap(func):
+            return func
+        if args and callable(args[0]):
+            return args[0]
+        return wrap
+
+
+@njit(cache=True)
+def rsi_wilder(close, period):
+    """Wilder's RSI over a 1-D close array, returning only the final scalar.
+
+    Seeds the averages with a simple mean over the first `period` deltas,
+    then applies the standard Wilder recursion avg = (avg*(n-1) + x) / n —
+    one pass, no intermediate arrays, unlike the where/rolling pandas
+    version which allocates two full Series just to read .iloc[-1].
+    """
+    n = close.shape[0]
+    if n < period + 1:
+        return np.nan
+
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(1, period + 1):
+        d = close[i] - close[i - 1]
+        if d > 0:
+            avg_gain += d
+        elif d < 0:
+            avg_loss -= d
+    avg_gain /= period
+    avg_loss /= period
+
+    for i in range(period + 1, n):
+        d = close[i] - close[i - 1]
+        gain = d if d > 0 else 0.0
+        loss = -d if d < 0 else 0.0
+        avg_gain = (avg_gain * (period - 1) + gain) / period
+        avg_loss = (avg_loss * (period - 1) + loss) / period
+
+    if avg_loss == 0.0:
+        return np.nan if avg_gain == 0.0 else 100.0
+    return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+
+@njit(cache=True, fastmath=True)
+def compute_all(high, low, close, atr_period, sma_short, sma_long, rsi_period):
+    """Compute (ATR, short SMA, long SMA, RSI) in one pass.
+
+    Inputs are 1-D contiguous float arrays. Returns np.nan for any
+    indicator whose minimum window isn't covered by the data — callers
+    map that back to None. Semantics match the original per-indicator
+    implementations: ATR = mean of the last `atr_period` True Ranges,
+    SMAs = trailing means, RSI = simple rolling-mean gains/losses.
+    """
+    n = close.shape[0]
+
+    # ATR — mean of the last atr_period True Ranges
+    atr = np.nan
+    if n >= atr_period + 1:
+        s = 0.0
+        for i in range(n - atr_period, n):
+            tr = high[i] - low[i]
+            d = abs(high[i] - close[i - 1])
+            if d > tr:
+                tr = d
+            d = abs(low[i] - close[i - 1])
+            if d > tr:
+                tr = d
+            s += tr
+        atr = s / atr_period
+
+    # SMAs — trailing means over the last window
+    sma_s = np.nan
+    if n >= sma_short:
+        s = 0.0
+        for i in range(n - sma_short, n):
+            s += close[i]
+        sma_s = s / sma_short
+
+    sma_l = np.nan
+    if n >= sma_long:
+        s = 0.0
+        for i in range(n - sma_long, n):
+            s += close[i]
+        sma_l = s / sma_long
+
+    # RSI — rolling-mean gains/losses over the last rsi_period deltas
+    rsi = np.nan
+    if n >= rsi_period + 1:
+        gain = 0.0
+        loss = 0.0
+        for i in range(n - rsi_period, n):
+            d = close[i] - close[i - 1]
+            if d > 0:
+                gain += d
+            elif d < 0:
+                loss -= d
+        if loss == 0.0:
+            rsi = np.nan if gain == 0.0 else 100.0
+        else:
+            rs = gain / loss
+            rsi = 100.0 - 100.0 / (1.0 + rs)
+
+    return atr, sma_s, sma_l, rsi
@@ -0,0 +1,17 @@
+"""
+_lazy.py — PEP 562 lazy attribute loader.
+
+Streamlit re-executes dashboard.py top-to-bottom on every interaction;
+importing trade_logger there pulls in config (and its .env load) at
+script start just to read the DB_FILE path. Module-level __getattr__
+defers that import until the attribute is first touched, then caches it
+in globals() so subsequent accesses are a plain dict hit.
+"""
+
+
+def __getattr__(name):
+    if name == "DB_FILE":
+        from trade_logger import DB_FILE
+        globals()["DB_FILE"] = DB_FILE
+        return DB_FILE
+    raise AttributeError(name)
@@ -1,48 +1,79 @@
-import os
+import asyncio
+import importlib.util
+
 import alpaca_trade_api as tradeapi
-from dotenv import load_dotenv
+import httpx
+from _env import ENV  # Loads .env exactly once per process
+
+BASE_URL = "https://paper-api.alpaca.markets"
+
+# HTTP/2 multiplexing needs the optional h2 package; fall back to
+# HTTP/1.1 keep-alive (still one TLS handshake) when it's absent.
+_HTTP2 = importlib.util.find_spec("h2") is not None
+
+
+async def _submit_covers(api_key, secret_key, shorts):
+    """Submit all buy-to-cover orders concurrently over one shared TLS
+    connection. Round-trips are pipelined via asyncio.gather instead of
+    paying a full handshake + request serially per order."""
+    headers = {
+        "APCA-API-KEY-ID": api_key,
+        "APCA-API-SECRET-KEY": secret_key,
+    }
+
+    async with httpx.AsyncClient(base_url=BASE_URL, headers=headers,
+                                 http2=_HTTP2, timeout=15.0) as client:
+        async def cover(symbol, cover_qty):
+            resp = await client.post("/v2/orders", json={
+                "symbol": symbol,
+                "qty": str(cover_qty),
+                "side": "buy",
+                "type": "market",
+                "time_in_force": "day",
+            })
+            resp.raise_for_status()
+            return resp.json()
+
+        results = await asyncio.gather(
+            *(cover(symbol, qty) for symbol, qty in shorts),
+            return_exceptions=True)
+
+    for (symbol, _), result in zip(shorts, results):
+        if isinstance(result, Exception):
+            print(f"   ❌ Failed to cover {symbol}: {result}")
+        else:
+            print(f"   🚀 Cover Order Submitted: {result.get('id')} (Status: {result.get('status')})")
 
-# Load environment variables
-load_dotenv()
 
 def close_all_shorts():
     print("--- Closing All Short Positions ---")
-    
-    api_key = os.getenv("ALPACA_API_KEY")
-    secret_key = os.getenv("ALPACA_SECRET_KEY")
-    base_url = "https://paper-api.alpaca.markets"
-    
+
+    api_key = ENV.get("ALPACA_API_KEY")
+    secret_key = ENV.get("ALPACA_SECRET_KEY")
+
     if not api_key or "REPLACE" in api_key:
         print("❌ Error: API Keys not found in .env")
         return
 
     try:
-        api = tradeapi.REST(api_key, secret_key, base_url, api_version='v2')
+        # tradeapi stays for the one-shot position listing; submission goes
+        # through the multiplexed httpx client below.
+        api = tradeapi.REST(api_key, secret_key, BASE_URL, api_version='v2')
         positions = api.list_positions()
-        
-        shorts_found = 0
-        for p in positions:
-            qty = int(p.qty)
-            if qty < 0:
-                shorts_found += 1
-                cover_qty = abs(qty)
-                print(f"📉 Found Short: {p.symbol} ({qty} shares). Buying to cover...")
-                
-                try:
-                    order = api.submit_order(
-                        symbol=p.symbol,
-                        qty=cover_qty,
-                        side='buy',
-                        type='market',
-                        time_in_force='day'
-                    )
-                    print(f"   🚀 Cover Order Submitted: {order.id} (Status: {order.status})")
-                except Exception as e:
-                    print(f"   ❌ Failed to cover {p.symbol}: {e}")
-        
-        if shorts_found == 0:
+
+        # Parse qty exactly once per position (walrus) — no second int() for
+        # the cover quantity, no repeated attribute descriptor lookups.
+        shorts = [(p.symbol, -q) for p in positions if (q := int(p.qty)) < 0]
+
+        if not shorts:
             print("✅ No short positions found.")
-            
+            return
+
+        for symbol, cover_qty in shorts:
+            print(f"📉 Found Short: {symbol} (-{cover_qty} shares). Buying to cover...")
+
+        asyncio.run(_submit_covers(api_key, secret_key, shorts))
+
     except Exception as e:
         print(f"❌ API Error: {e}")
 
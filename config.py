@@ -1,39 +1,37 @@
-import os
-from dotenv import load_dotenv
+from dataclasses import dataclass
 
-# Load environment variables
-load_dotenv()
+from _env import ENV  # Loads .env exactly once per process
 
 # API Configuration
-DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
+DEEPSEEK_API_KEY = ENV.get("DEEPSEEK_API_KEY")
 DEEPSEEK_BASE_URL = "https://api.deepseek.com"
 
 # Gemini Configuration (Consensus Auditor)
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_API_KEY = ENV.get("GEMINI_API_KEY")
 GEMINI_MODEL_NAME = "gemini-2.5-flash"          # Stable tier — no more 503
 
-# RSS Feeds - Dual Feed Architecture
-MACRO_FEEDS = [
+# RSS Feeds - Dual Feed Architecture (tuples: immutable, built once at import)
+MACRO_FEEDS = (
     # Macro / Global Markets (For Environment Bias & Defense Mode)
     "https://finance.yahoo.com/news/rssindex",
     "https://news.google.com/rss/headlines/section/topic/BUSINESS", # Google News Business (Highly Reliable)
     "https://feeds.a.dj.com/rss/RSSMarketsMain.xml", # WSJ Markets
-]
+)
 
-TECH_FEEDS = [
+TECH_FEEDS = (
     # US / Global Tech & AI
     "https://techcrunch.com/category/artificial-intelligence/feed/",
     "https://venturebeat.com/category/ai/feed/",
     "https://www.wired.com/feed/category/business/latest/rss",
-    
+
     # Asia
     "https://asia.nikkei.com/rss/feed/nar", # General Nikkei feed
     "https://www.techinasia.com/feed",
-    
+
     # Europe
     "https://thenextweb.com/feed",
     "https://www.eu-startups.com/feed/"
-]
+)
 
 # Analysis Configuration
 MODEL_NAME = "deepseek-chat"
@@ -62,35 +60,61 @@ Do not include markdown formatting (like ```json), just the raw JSON object.
 """
 
 # --- FIVE PILLARS RISK FRAMEWORK v2.0 ---
-TOTAL_BUDGET = 5000.0
-
-# Pillar 1: Slot-Based Execution
-MAX_SLOTS = 3
-FULL_REPLACE_THRESHOLD = 1.20      # New must score 20% higher for full replace
-COOLDOWN_DAYS = 30                 # Blacklist after sell
-BLACKLIST_OVERRIDE_BIAS = 0.80     # R4: News Override threshold
-
-# Pillar 2: Volatility Moat & Smart Sizing
-RISK_PER_TRADE_PCT = 0.02          # 2% Rule
-ATR_MULTIPLIER = 2.0
-ATR_PERIOD = 14
-MAX_VOLATILITY_PCT = 0.08          # ATR/Price > 8% = too risky
-
-# Pillar 3: Absolute Stop-Loss & Trailing
-BREAKEVEN_TRIGGER_PCT = 0.03       # Move stop to entry at +3%
-TRAILING_ACTIVATION_PCT = 0.05     # Activate trail at +5%
-TRAILING_DROP_PCT = 0.015          # 1.5% trailing stop from peak
-
-# Pillar 4: Cost-Aware Execution
-MIN_ORDER_VALUE = 1000.0           # £1000 for £5k base
-
-# Pillar 5: Incremental Swap
-SCOUT_REPLACE_THRESHOLD = 1.15     # 15% higher = scout swap (50%)
-SCOUT_VALIDATION_SESSIONS = 2      # Sessions before completing swap
-SCOUT_MERCY_DROP_PCT = 0.10        # R1: auto-liquidate if score drops >10%
-
-# Scoring
-RETURN_CAP = 0.10                  # R3: max Return% in scoring formula
+# Frozen slots dataclass: attribute reads are fixed-offset C-level loads
+# instead of module __dict__ hash lookups in the hot scoring/sizing loops,
+# and the values cannot be mutated at runtime.
+@dataclass(frozen=True, slots=True)
+class Risk:
+    total_budget: float = 5000.0
+
+    # Pillar 1: Slot-Based Execution
+    max_slots: int = 3
+    full_replace_threshold: float = 1.20    # New must score 20% higher for full replace
+    cooldown_days: int = 30                 # Blacklist after sell
+    blacklist_override_bias: float = 0.80   # R4: News Override threshold
+
+    # Pillar 2: Volatility Moat & Smart Sizing
+    risk_per_trade_pct: float = 0.02        # 2% Rule
+    atr_multiplier: float = 2.0
+    atr_period: int = 14
+    max_volatility_pct: float = 0.08        # ATR/Price > 8% = too risky
+
+    # Pillar 3: Absolute Stop-Loss & Trailing
+    breakeven_trigger_pct: float = 0.03     # Move stop to entry at +3%
+    trailing_activation_pct: float = 0.05   # Activate trail at +5%
+    trailing_drop_pct: float = 0.015        # 1.5% trailing stop from peak
+
+    # Pillar 4: Cost-Aware Execution
+    min_order_value: float = 1000.0         # £1000 for £5k base
+
+    # Pillar 5: Incremental Swap
+    scout_replace_threshold: float = 1.15   # 15% higher = scout swap (50%)
+    scout_validation_sessions: int = 2      # Sessions before completing swap
+    scout_mercy_drop_pct: float = 0.10      # R1: auto-liquidate if score drops >10%
+
+    # Scoring
+    return_cap: float = 0.10                # R3: max Return% in scoring formula
+
+RISK = Risk()
+
+# Module-level aliases — single source of truth is RISK above.
+TOTAL_BUDGET = RISK.total_budget
+MAX_SLOTS = RISK.max_slots
+FULL_REPLACE_THRESHOLD = RISK.full_replace_threshold
+COOLDOWN_DAYS = RISK.cooldown_days
+BLACKLIST_OVERRIDE_BIAS = RISK.blacklist_override_bias
+RISK_PER_TRADE_PCT = RISK.risk_per_trade_pct
+ATR_MULTIPLIER = RISK.atr_multiplier
+ATR_PERIOD = RISK.atr_period
+MAX_VOLATILITY_PCT = RISK.max_volatility_pct
+BREAKEVEN_TRIGGER_PCT = RISK.breakeven_trigger_pct
+TRAILING_ACTIVATION_PCT = RISK.trailing_activation_pct
+TRAILING_DROP_PCT = RISK.trailing_drop_pct
+MIN_ORDER_VALUE = RISK.min_order_value
+SCOUT_REPLACE_THRESHOLD = RISK.scout_replace_threshold
+SCOUT_VALIDATION_SESSIONS = RISK.scout_validation_sessions
+SCOUT_MERCY_DROP_PCT = RISK.scout_mercy_drop_pct
+RETURN_CAP = RISK.return_cap
 
 # --- GRADUATED RISK SCALING (replaces binary Defense Mode) ---
 # Each tier: (env_bias_threshold, max_slots_allowed, min_entry_score)
@@ -123,5 +147,5 @@ ELEVATED_DECAY_RATE = 0.02         # Reduce min_entry_score by this per day past
 ELEVATED_MIN_FLOOR = 0.50          # Never decay below this score
 
 # --- TELEGRAM MONITORING ---
-TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
-TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID", "")
+TELEGRAM_BOT_TOKEN = ENV.get("TELEGRAM_BOT_TOKEN", "")
+TELEGRAM_CHAT_ID = ENV.get("TELEGRAM_CHAT_ID", "")
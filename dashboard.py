@@ -1,7 +1,15 @@
 import streamlit as st
 import sqlite3
+import numpy as np
 import pandas as pd
-from trade_logger import DB_FILE
+import _lazy  # Defers the trade_logger/config import until DB_FILE is needed
+
+# Optional Arrow fast path: ADBC streams SQLite rows into a columnar Arrow
+# table directly, skipping per-row PyObject boxing before pandas.
+try:
+    import adbc_driver_sqlite.dbapi as adbc
+except ImportError:
+    adbc = None
 
 # Page Config
 st.set_page_config(page_title="AI Trading Brain - Dashboard", layout="wide")
@@ -9,14 +17,90 @@ st.set_page_config(page_title="AI Trading Brain - Dashboard", layout="wide")
 st.title("🧠 AI Trading Brain - Decision Log")
 
 # Setup Database Connection
-@st.cache_data(ttl=5) # Refresh every 5 seconds
-def load_data():
-    conn = sqlite3.connect(DB_FILE)
-    query = "SELECT * FROM history ORDER BY id DESC"
-    df = pd.read_sql_query(query, conn)
-    conn.close()
+@st.cache_resource # One connection per process — keeps SQLite's page cache hot
+def _conn():
+    conn = sqlite3.connect(_lazy.DB_FILE, check_same_thread=False)
+    conn.execute("PRAGMA cache_size = -65536")   # 64 MiB page cache
+    conn.execute("PRAGMA mmap_size = 268435456") # 256 MiB memory-mapped I/O
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA journal_mode = WAL")    # Readers don't block the trader's writes
+    # Ensure the hot-query index exists even on DBs created before init_db
+    # added it. Must match trade_logger's DDL exactly — init_db drops stale
+    # indexes, so recreating one here would ping-pong a table scan per start.
+    # ORDER BY id DESC needs no index: id aliases the rowid, so tail reads
+    # are already a reverse table scan.
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS ix_hist_ta_ts"
+        "    ON history(ticker, action, timestamp DESC)")
+    return conn
+
+INITIAL_ROWS = 10_000  # First-load cap; later refreshes fetch deltas only
+
+# Only the columns the table + metrics actually display. The long reasoning
+# text columns are fetched lazily in the Deep Dive expander for one row.
+COLS = ('id', 'timestamp', 'ticker', 'action', 'quantity', 'price',
+        'rsi_14', 'sma_20', 'sentiment_score', 'pnl', 'pnl_percent')
+LIGHT_COLS = ", ".join(COLS)
+
+@st.cache_resource
+def _adbc_conn():
+    return adbc.connect(str(_lazy.DB_FILE))
+
+def _fetch_df(query, params=()):
+    """Run a query and build a DataFrame. Prefers the ADBC→Arrow zero-copy
+    path when adbc_driver_sqlite is installed; otherwise falls back to
+    from_records on the persistent sqlite3 connection, which still skips
+    read_sql_query's per-call cursor.description introspection."""
+    if adbc is not None:
+        try:
+            with _adbc_conn().cursor() as cur:
+                cur.execute(query, params)
+                return cur.fetch_arrow_table().to_pandas()
+        except Exception:
+            pass  # Arrow path unavailable for this query — use sqlite3
+    cur = _conn().execute(query, params)
+    cur.arraysize = 1000  # Batch row fetches
+    return pd.DataFrame.from_records(cur.fetchall(), columns=COLS)
+
+@st.cache_data(ttl=60)
+def _load_history(db_max_id):
+    """Incremental tail fetch: only rows newer than the highest id already
+    seen are pulled from SQLite; everything else is served from the
+    DataFrame cached in st.session_state. O(new rows) per refresh instead
+    of rescanning the whole history table every 5 seconds.
+
+    Keyed on the table's current max(id): the cache_data layer returns the
+    memoized frame whenever no rows were written since the last build, so
+    the pandas rebuild only runs when there is actually new data (with a
+    60 s TTL as a safety net)."""
+    cached = st.session_state.get('history_df')
+
+    if cached is None:
+        df = _fetch_df(
+            f"SELECT {LIGHT_COLS} FROM history ORDER BY id DESC LIMIT {INITIAL_ROWS}")
+    else:
+        max_id = st.session_state.get('history_max_id', 0)
+        new_rows = _fetch_df(
+            f"SELECT {LIGHT_COLS} FROM history WHERE id > ? ORDER BY id DESC",
+            (max_id,))
+        df = pd.concat([new_rows, cached], ignore_index=True) if not new_rows.empty else cached
+
+    if not df.empty:
+        st.session_state.history_max_id = int(df['id'].iloc[0])
+        # Categorical dtype: filtering becomes integer code comparison and
+        # .unique() is O(#categories); ~10x smaller than object strings.
+        # Re-cast after concat — mixing categories falls back to object.
+        for c in ('ticker', 'action'):
+            df[c] = df[c].astype('category')
+    st.session_state.history_df = df
     return df
 
+def load_data():
+    # Cheap probe: a single max(id) lookup decides whether the expensive
+    # cached rebuild above needs to run at all.
+    row = _conn().execute("SELECT max(id) FROM history").fetchone()
+    return _load_history(row[0] if row else None)
+
 # Load Data
 try:
     df = load_data()
@@ -39,18 +123,32 @@ selected_ticker = st.sidebar.selectbox("Select Ticker", tickers)
 actions = ["All"] + list(df['action'].unique())
 selected_action = st.sidebar.selectbox("Select Action", actions)
 
-# Apply Filters
-filtered_df = df.copy()
+def _cat_mask(col, value):
+    """Boolean mask over a Categorical column by comparing integer codes —
+    one resolved category lookup, then a pure int comparison in NumPy."""
+    try:
+        code = col.cat.categories.get_loc(value)
+    except KeyError:
+        return np.zeros(len(col), dtype=bool)  # Value not in this frame
+    return col.cat.codes.to_numpy() == code
+
+# Apply Filters — combine both conditions into one mask and slice once,
+# instead of df.copy() plus an intermediate DataFrame per filter.
+# The common "All"/"All" default path does no work at all.
+mask = None
 if selected_ticker != "All":
-    filtered_df = filtered_df[filtered_df['ticker'] == selected_ticker]
+    mask = _cat_mask(df['ticker'], selected_ticker)
 if selected_action != "All":
-    filtered_df = filtered_df[filtered_df['action'] == selected_action]
+    action_mask = _cat_mask(df['action'], selected_action)
+    mask = action_mask if mask is None else (mask & action_mask)
+filtered_df = df if mask is None else df[mask]
 
-# Metrics
+# Metrics — one value_counts pass instead of a boolean mask per action
+action_counts = filtered_df['action'].value_counts()
 col1, col2, col3, col4 = st.columns(4)
 col1.metric("Total Decisions", len(filtered_df))
-col2.metric("Buys", len(filtered_df[filtered_df['action'] == 'BUY']))
-col3.metric("Sells", len(filtered_df[filtered_df['action'] == 'SELL']))
+col2.metric("Buys", int(action_counts.get('BUY', 0)))
+col3.metric("Sells", int(action_counts.get('SELL', 0)))
 
 # Calculate Realized P&L
 realized_pnl = filtered_df['pnl'].sum()
@@ -59,14 +157,17 @@ col4.metric("Realized P&L", f"${realized_pnl:,.2f}", delta_color="normal")
 # Main Table
 st.subheader("Recent Decisions")
 
-def style_pnl(val):
-    color = 'red' if val < 0 else 'green'
-    return f'color: {color}'
+def style_pnl(s):
+    # Vectorized: one NumPy comparison per column instead of a Python
+    # callback per cell (the old applymap-style per-value function).
+    return np.where(s.to_numpy() < 0, 'color: red', 'color: green')
 
-st.dataframe(
-    filtered_df,
-    width='stretch', # Replaces use_container_width=True
-    column_config={
+@st.cache_data
+def _column_config():
+    # Streamlit reruns this script top-to-bottom on every interaction;
+    # memoizing the formatter dict builds these objects once instead of
+    # re-allocating them per rerun.
+    return {
         "timestamp": st.column_config.DatetimeColumn("Time", format="D MMM, HH:mm:ss"),
         "sentiment_score": st.column_config.NumberColumn("Sent. Score", format="%.2f"),
         "rsi_14": st.column_config.NumberColumn("RSI (14)", format="%.1f"),
@@ -75,13 +176,19 @@ st.dataframe(
         "pnl": st.column_config.NumberColumn("P&L ($)", format="$%.2f"),
         "pnl_percent": st.column_config.NumberColumn("P&L (%)", format="%.2f%%"),
     }
+
+st.dataframe(
+    filtered_df.style.apply(style_pnl, subset=['pnl', 'pnl_percent']),
+    width='stretch', # Replaces use_container_width=True
+    column_config=_column_config()
 )
 
 # Detailed View (Expander)
 st.subheader("Deep Dive")
 if not filtered_df.empty:
     selected_id = st.selectbox("Select Decision ID to Inspect", filtered_df['id'])
-    row = filtered_df[filtered_df['id'] == selected_id].iloc[0]
+    # Indexed .loc lookup instead of a full boolean scan per render
+    row = filtered_df.set_index('id', drop=False).loc[selected_id]
     
     with st.expander("See Full Details", expanded=True):
         c1, c2 = st.columns(2)
@@ -94,8 +201,14 @@ if not filtered_df.empty:
         c2.write(f"**Sentiment:** {row['sentiment_score']}")
         
         st.markdown("---")
+        # Long text columns are excluded from LIGHT_COLS — fetch for this row only
+        reasons = _conn().execute(
+            "SELECT sentiment_reason, decision_reason FROM history WHERE id = ?",
+            (int(selected_id),)).fetchone()
+        sentiment_reason, decision_reason = reasons if reasons else ('', '')
+
         st.write("**AI Reasoning:**")
-        st.info(row['sentiment_reason'])
-        
+        st.info(sentiment_reason)
+
         st.write("**Final Decision Logic:**")
-        st.success(row['decision_reason'])
+        st.success(decision_reason)
@@ -1,16 +1,46 @@
+import atexit
 import json
+import re
+import sys
+import threading
+import time
 import os
-import math
+
+try:
+    import orjson  # C JSON codec — 3-10x faster on these dict-heavy payloads
+except ImportError:
+    orjson = None
 import pandas as pd
 import numpy as np
-from alpaca.trading.client import TradingClient
-from alpaca.data.historical import StockHistoricalDataClient
-from alpaca.data.requests import StockBarsRequest, StockLatestQuoteRequest
-from alpaca.data.timeframe import TimeFrame
 import config
 import trade_logger  # [NEW] Import Logger
+import _indicators  # Fused ATR/SMA/RSI kernel (numba-accelerated when available)
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, fields
 from datetime import datetime, timedelta
 
+
+@dataclass(slots=True)
+class Order:
+    """One planned trade. slots=True gives a fixed-layout record instead of
+    a per-order dict — smaller, faster attribute access, less GC pressure.
+    Serialized to the same JSON shape trader.py already consumes."""
+    ticker: str
+    action: str
+    quantity: int
+    order_type: str
+    reason: str
+    decision_id: int = None
+    limit_price: float = None
+    paired_sell_ticker: str = None
+
+    def to_dict(self):
+        """Dict form for json.dump(default=...); drops unset optional keys
+        so the plan file keeps its historical shape."""
+        return {f.name: getattr(self, f.name) for f in fields(self)
+                if getattr(self, f.name) is not None}
+
+
 class TradingLogic:
     def __init__(self):
         self.budget = config.TOTAL_BUDGET
@@ -49,6 +79,10 @@ class TradingLogic:
         self.data_client = None
         if "REPLACE" not in self.api_key:
              try:
+                 # Deferred: the alpaca SDK drags in a large dependency tree,
+                 # so it's only imported when credentials are configured
+                 from alpaca.trading.client import TradingClient
+                 from alpaca.data.historical import StockHistoricalDataClient
                  self.client = TradingClient(self.api_key, self.secret_key, paper=True)
                  self.data_client = StockHistoricalDataClient(self.api_key, self.secret_key)
              except Exception as e:
@@ -60,9 +94,120 @@ class TradingLogic:
         # Initialize Database
         trade_logger.init_db()
         
-        # Ticker validation cache
+        # Ticker validation cache — persisted across runs so a warm start
+        # skips one get_asset HTTPS round-trip per already-known ticker
         self._ticker_cache = {}
+        self._ticker_cache_file = os.path.join('data', 'ticker_cache.json')
+        try:
+            with open(self._ticker_cache_file) as f:
+                self._ticker_cache = json.load(f)
+        except (OSError, ValueError):
+            pass
+        atexit.register(self._save_ticker_cache)
+
+        # Latest-price cache, warmed once per plan by fetch_prices_bulk
+        self._price_cache = {}
+
+        # Daily-bars cache keyed on (ticker, date, days) — see fetch_history
+        self._history_cache = {}
 
+        # Per-ticker DB state (last buy time + latest scores), bulk-loaded
+        # once per plan run — see trade_logger.get_ticker_state_bulk
+        self._ticker_state = {}
+
+        # Blacklisted tickers (genuine negative exits in the cooldown
+        # window), bulk-loaded once per plan run
+        self._blacklisted = set()
+
+        # Per-ticker technical snapshots (ohlc + indicators), reset per plan
+        self._indicator_snapshot = {}
+
+        # Decision write buffer — a list during a plan run (flushed in one
+        # executemany transaction), None otherwise (immediate writes)
+        self._decision_buffer = None
+
+        # Status-line buffer, same shape as the decision buffer: a list
+        # during a plan run (flushed in one stdout write), None otherwise.
+        # quiet=True drops status output entirely (e.g. batch replays).
+        self._log_lines = None
+        self.quiet = False
+
+
+    def _save_ticker_cache(self):
+        """Flushes the validation cache to disk at process exit.
+
+        Only persisted when the API client was live — the no-client path
+        optimistically caches True, which must not survive a restart.
+        Negative verdicts also stay per-process: validate_ticker's except
+        branch can't tell a transient API error from a missing asset, so
+        a persisted False (which has no expiry) could silently exclude a
+        valid ticker from every future run.
+        """
+        if not self.client:
+            return
+        positives = {t: True for t, v in self._ticker_cache.items() if v}
+        if not positives:
+            return
+        try:
+            with open(self._ticker_cache_file, 'w') as f:
+                json.dump(positives, f)
+        except OSError:
+            pass
+
+    def _log_decision(self, payload):
+        """Queues a decision during a plan run; writes immediately otherwise.
+
+        Buffered entries get a negative placeholder id, rewritten to the
+        real row id by _flush_decisions once the whole run is inserted in
+        a single transaction. The real timestamp is captured at queue time
+        so row ordering still reflects decision order.
+        """
+        if self._decision_buffer is None:
+            return trade_logger.log_decision(payload)
+        payload.setdefault('_timestamp', datetime.now().isoformat())
+        self._decision_buffer.append(payload)
+        return -len(self._decision_buffer)
+
+    # Buffered status lines reference queued decisions as [DB#-n] until
+    # _flush_decisions learns the real row ids
+    _DB_PLACEHOLDER = re.compile(r'\[DB#-(\d+)\]')
+
+    def _flush_decisions(self, orders):
+        """Writes all buffered decisions via trade_logger.bulk_log and patches
+        placeholder decision ids in the generated orders with real row ids."""
+        buffered, self._decision_buffer = self._decision_buffer, None
+        if not buffered:
+            return
+        ids = trade_logger.bulk_log(buffered)
+        for order in orders:
+            did = order.decision_id
+            if did is not None and did < 0:
+                order.decision_id = ids[-did - 1]
+        # The status buffer flushes after this, so any [DB#-n] placeholder
+        # captured in an operator-facing line gets its real row id too
+        if self._log_lines:
+            self._log_lines = [
+                self._DB_PLACEHOLDER.sub(lambda m: f'[DB#{ids[int(m.group(1)) - 1]}]', line)
+                for line in self._log_lines]
+
+    def _log(self, msg):
+        """Queues a status line during a plan run; prints immediately otherwise.
+
+        Per-decision print() calls each pay a syscall inside the hot loop —
+        buffering them and writing once at the end keeps the loop CPU-bound.
+        """
+        if self.quiet:
+            return
+        if self._log_lines is None:
+            print(msg)
+        else:
+            self._log_lines.append(msg)
+
+    def _flush_log(self):
+        """Emits all buffered status lines in a single stdout write."""
+        lines, self._log_lines = self._log_lines, None
+        if lines:
+            sys.stdout.write('\n'.join(lines) + '\n')
 
     def calculate_weighted_score(self, bias, return_pct, atr, price):
         """
@@ -95,8 +240,9 @@ class TradingLogic:
         capital_qty = slot_budget / price
         
         # The system takes the MOST conservative (smallest) quantity
+        # (int() truncation == floor for these non-negative quantities)
         final_qty = min(atr_qty, capital_qty)
-        return math.floor(final_qty)
+        return int(final_qty)
 
     def validate_ticker(self, ticker):
         """
@@ -122,15 +268,44 @@ class TradingLogic:
             self._ticker_cache[ticker] = False
             return False
 
+    def fetch_prices_bulk(self, tickers):
+        """
+        Pre-fetches latest quotes for many tickers in ONE multi-symbol API
+        round-trip and warms self._price_cache. fetch_price() consults the
+        cache first, so N per-ticker HTTP calls collapse into a single one.
+        """
+        tickers = sorted(t for t in tickers if t)
+        if not tickers or not self.data_client:
+            return
+
+        try:
+            from alpaca.data.requests import StockLatestQuoteRequest
+            req = StockLatestQuoteRequest(symbol_or_symbols=tickers)
+            quotes = self.data_client.get_stock_latest_quote(req)
+            for sym, quote in quotes.items():
+                price = float(quote.ask_price or quote.bid_price or 0)
+                if price > 0:
+                    self._price_cache[sym] = price
+            print(f"  [API] Bulk-fetched {len(self._price_cache)} quotes in one request")
+        except Exception as e:
+            print(f"  ⚠️ Bulk quote fetch failed ({e}) — falling back to per-ticker fetches.")
+
     def fetch_price(self, ticker):
         """
         Fetches current price from Alpaca. Falls back to manual input if API fails.
+        Served from the bulk-prefetched cache when available.
         """
+        # 0. Bulk cache hit — no network round-trip
+        cached = self._price_cache.get(ticker)
+        if cached:
+            return cached
+
         price = None
-        
+
         # 1. Try Alpaca
         if self.data_client:
             try:
+                from alpaca.data.requests import StockLatestQuoteRequest
                 req = StockLatestQuoteRequest(symbol_or_symbols=ticker)
                 quote = self.data_client.get_stock_latest_quote(req)
                 price = float(quote[ticker].ask_price or quote[ticker].bid_price)
@@ -138,8 +313,14 @@ class TradingLogic:
             except Exception as e:
                 pass
         
-        # 2. Manual Fallback
+        # 2. Manual Fallback — main thread only. The risk-check pool
+        # workers must never prompt: concurrent input() calls steal each
+        # other's stdin lines, and under the non-interactive supervisor
+        # the EOFError would crash the whole batch out of ex.map.
         if price is None:
+            if threading.current_thread() is not threading.main_thread():
+                print(f"  [⚠️ WARNING] Price for {ticker} unavailable via API — skipping (worker thread).")
+                return None
             print(f"  [⚠️ WARNING] Price for {ticker} unavailable via API.")
             while True:
                 try:
@@ -157,11 +338,21 @@ class TradingLogic:
         """
         Fetches historical daily bars for technical analysis.
         Returns a DataFrame with 'high', 'low', 'close' columns (needed for ATR).
+        Memoized per (ticker, trading day): daily bars don't change within a
+        session, so repeat callers (risk check + buy filter) hit the cache
+        instead of paying a fresh Alpaca round-trip.
         """
         if not self.data_client:
             return None
-            
+
+        cache_key = (ticker, datetime.now().date(), days)
+        if cache_key in self._history_cache:
+            return self._history_cache[cache_key]
+
         try:
+            from alpaca.data.requests import StockBarsRequest
+            from alpaca.data.timeframe import TimeFrame
+
             end_date = datetime.now()
             start_date = end_date - timedelta(days=days*2)
             
@@ -183,11 +374,96 @@ class TradingLogic:
             if isinstance(bars.index, pd.MultiIndex):
                 bars = bars.xs(ticker, level='symbol')
             
-            return bars[['high', 'low', 'close']]
-            
+            ohlc = bars[['high', 'low', 'close']]
+            # Only successful fetches are cached — a transient API failure
+            # shouldn't pin None for the rest of the day.
+            self._history_cache[cache_key] = ohlc
+            return ohlc
+
         except Exception as e:
             return None
 
+    def fetch_history_bulk(self, tickers, days=60):
+        """
+        Pre-fetches daily bars for many tickers in ONE multi-symbol bars
+        request and warms the fetch_history memo. Collapses N sequential
+        bar fetches into a single API round-trip, the same way
+        fetch_prices_bulk does for quotes.
+        """
+        today = datetime.now().date()
+        tickers = sorted(t for t in tickers
+                         if t and (t, today, days) not in self._history_cache)
+        if not tickers or not self.data_client:
+            return
+
+        try:
+            from alpaca.data.requests import StockBarsRequest
+            from alpaca.data.timeframe import TimeFrame
+
+            end_date = datetime.now()
+            start_date = end_date - timedelta(days=days*2)
+
+            req = StockBarsRequest(
+                symbol_or_symbols=tickers,
+                timeframe=TimeFrame.Day,
+                start=start_date,
+                end=end_date,
+                feed='iex'
+            )
+            bars = self.data_client.get_stock_bars(req).df
+            if bars.empty:
+                return
+
+            for ticker, group in bars.groupby(level='symbol'):
+                ohlc = group.droplevel('symbol')[['high', 'low', 'close']]
+                if not ohlc.empty:
+                    self._history_cache[(ticker, today, days)] = ohlc.iloc[-days:]
+            print(f"  [API] Bulk-fetched bars for {len(tickers)} tickers in one request")
+        except Exception as e:
+            print(f"  ⚠️ Bulk bars fetch failed ({e}) — falling back to per-ticker fetches.")
+
+    def _compute_indicators(self, ohlc):
+        """Fused single-pass ATR14/SMA20/SMA50/RSI14 over one OHLC frame.
+
+        Replaces four back-to-back pandas rolling computations with one
+        kernel call (see _indicators.py). Returns a 4-tuple with None for
+        any indicator the data can't cover.
+        """
+        if ohlc is None or len(ohlc) == 0:
+            return None, None, None, None
+
+        # float32 is plenty for 2-4 significant-decimal prices and halves the
+        # kernel's memory traffic (numba specializes on the narrower dtype);
+        # relative drift vs float64 is ~1e-6, far below order-sizing granularity
+        high = np.ascontiguousarray(ohlc['high'].to_numpy(dtype=np.float32))
+        low = np.ascontiguousarray(ohlc['low'].to_numpy(dtype=np.float32))
+        close = np.ascontiguousarray(ohlc['close'].to_numpy(dtype=np.float32))
+
+        atr, sma_20, sma_50, rsi = _indicators.compute_all(
+            high, low, close, self.atr_period, 20, 50, 14)
+
+        to_none = lambda v: None if np.isnan(v) else float(v)
+        return to_none(atr), to_none(sma_20), to_none(sma_50), to_none(rsi)
+
+    def _snapshot(self, ticker):
+        """Per-ticker technical snapshot, computed at most once per plan run.
+
+        A ticker can appear as a holding (risk check + holdings scoring) AND
+        as a buy candidate in the same run; without this, each path redoes
+        the history fetch and the indicator pass. Memoized in
+        self._indicator_snapshot, which generate_plan resets per run. The
+        threaded risk check populates it concurrently, so the later serial
+        loops get pure cache hits.
+        """
+        snap = self._indicator_snapshot.get(ticker)
+        if snap is None:
+            ohlc = self.fetch_history(ticker)
+            atr, sma_20, sma_50, rsi = self._compute_indicators(ohlc)
+            snap = {'ohlc': ohlc, 'atr': atr, 'sma_20': sma_20,
+                    'sma_50': sma_50, 'rsi': rsi}
+            self._indicator_snapshot[ticker] = snap
+        return snap
+
     def calculate_atr(self, ohlc_df, period=14):
         """
         Calculates ATR (Average True Range) from an OHLC DataFrame.
@@ -196,20 +472,20 @@ class TradingLogic:
         """
         if ohlc_df is None or len(ohlc_df) < period + 1:
             return None
-        
-        high = ohlc_df['high']
-        low = ohlc_df['low']
-        close = ohlc_df['close']
-        prev_close = close.shift(1)
-        
-        tr1 = high - low
-        tr2 = (high - prev_close).abs()
-        tr3 = (low - prev_close).abs()
-        
-        true_range = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        atr = true_range.rolling(window=period).mean().iloc[-1]
-        
-        return atr if not np.isnan(atr) else None
+
+        # Vectorized: raw NumPy arrays, one fused max pass — no 3-column
+        # DataFrame concat + row-wise max dispatch per call
+        # TR over rows [1:] against the unshifted close slice — no NaN-padded
+        # prev-close array; the first row never had a defined TR anyway
+        h = ohlc_df['high'].to_numpy()[1:]
+        l = ohlc_df['low'].to_numpy()[1:]
+        c = ohlc_df['close'].to_numpy()
+        pc = c[:-1]
+
+        tr = np.maximum.reduce([h - l, np.abs(h - pc), np.abs(l - pc)])
+        atr = np.mean(tr[-period:])  # Rolling-mean tail == mean of last `period` TRs
+
+        return float(atr) if not np.isnan(atr) else None
 
     def calculate_rsi(self, series, period=14):
         """
@@ -217,7 +493,13 @@ class TradingLogic:
         """
         if len(series) < period + 1:
             return None
-            
+
+        if _indicators.NUMBA_AVAILABLE:
+            # One-pass Wilder recursion, JIT-compiled — no intermediate Series
+            rsi = _indicators.rsi_wilder(
+                np.ascontiguousarray(series.to_numpy(dtype=np.float64)), period)
+            return None if np.isnan(rsi) else float(rsi)
+
         delta = series.diff()
         gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
         loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
@@ -232,168 +514,232 @@ class TradingLogic:
         """
         if len(series) < period:
             return None
-        return series.rolling(window=period).mean().iloc[-1]
+        # Only the last value of the rolling mean is needed — the mean of the
+        # trailing window, without materializing the whole rolling Series
+        return float(np.mean(series.to_numpy()[-period:]))
 
-    def check_portfolio_risks(self, holdings_data):
+    def check_portfolio_risks(self, holdings_data, atr_mult=None):
         """
         Checks for stop-loss, trailing take-profit, and technical breakdown conditions.
         Uses LIVE Alpaca position data (avg_entry_price) for accuracy.
-        
+
+        Per-ticker evaluation (price/history fetches + indicator math) fans out
+        across a thread pool — the work is network-bound, so wall time drops
+        from N round-trips to roughly one. All SQLite writes happen serially
+        afterwards on this thread.
+
         Returns: (sell_orders, total_proceeds)
             sell_orders: list of SELL order dicts
             total_proceeds: float, estimated cash freed by risk sells (for liquidity recycling)
         """
         sell_orders = []
         total_proceeds = 0.0
-        print("\n--- Checking Portfolio Risks (ATR Stop / Trailing TP / Whipsaw) ---")
-        
-        for ticker, data in holdings_data.items():
-            buy_price = data.get('avg_entry', data.get('buy_price', 0))
-            shares = int(data.get('qty', data.get('shares', 0)))
-            
-            if shares <= 0:
-                continue
-                
-            current_price = data.get('current_price') or self.fetch_price(ticker)
-            if not current_price:
+        if atr_mult is None:
+            atr_mult = self.atr_multiplier
+        self._log("\n--- Checking Portfolio Risks (ATR Stop / Trailing TP / Whipsaw) ---")
+
+        # One clock read for the whole pass instead of a datetime.now()
+        # per holding inside the hold-duration checks
+        now_ts = time.time()
+
+        with ThreadPoolExecutor(max_workers=16) as ex:
+            results = list(ex.map(lambda kv: self._evaluate_holding(kv[0], kv[1], now_ts, atr_mult),
+                                  holdings_data.items()))
+
+        # Aggregate + log serially: SQLite takes a single write lock, so
+        # funnelling log_decision through one thread avoids lock contention.
+        for res in results:
+            if res is None:
                 continue
-            
-            # Fetch historical data (OHLC) for ATR and SMA calculations
-            ohlc = self.fetch_history(ticker)
-            close_series = ohlc['close'] if ohlc is not None else None
-            
-            # Calculate indicators
-            atr_14 = self.calculate_atr(ohlc, self.atr_period) if ohlc is not None else None
-            sma_20 = self.calculate_sma(close_series, 20) if close_series is not None else None
-            sma_50 = self.calculate_sma(close_series, 50) if close_series is not None else None
-            
-            sell_reason = None
-            
-            # ============================================================
-            # PILLAR 3: ATR-Based Stop-Loss + Breakeven + Trailing
-            # ============================================================
-            if atr_14 and atr_14 > 0:
-                stop_price = buy_price - (self.atr_multiplier * atr_14)
+            for line in res['lines']:
+                self._log(line)
+            decision_id = self._log_decision(res['log'])
+            if res['sell_order'] is not None:
+                res['sell_order'].decision_id = decision_id
+                sell_orders.append(res['sell_order'])
+                total_proceeds += res['proceeds']
+
+        return sell_orders, total_proceeds
+
+    def _last_buy_time(self, ticker):
+        """Last BUY timestamp, served from the bulk-loaded ticker state when
+        generate_plan warmed it; falls back to a per-ticker query otherwise."""
+        if ticker in self._ticker_state:
+            return self._ticker_state[ticker]['last_buy']
+        return trade_logger.get_last_buy_time(ticker)
+
+    def _latest_scores(self, ticker):
+        """Latest (sentiment, duration) scores, cache-first like _last_buy_time."""
+        if ticker in self._ticker_state:
+            state = self._ticker_state[ticker]
+            return {'sentiment': state['sentiment'], 'duration': state['duration']}
+        return trade_logger.get_latest_scores(ticker)
+
+    def _evaluate_holding(self, ticker, data, now_ts=None, atr_mult=None):
+        """
+        Evaluate one holding against the risk ladder (ATR stop / trailing TP /
+        whipsaw breakdown / time stop). Pure fetch + math — no DB writes, so
+        it is safe to run on a worker thread.
+
+        Returns None for skipped holdings, otherwise a dict:
+            lines: status lines for the caller to print (in order)
+            log: payload for trade_logger.log_decision
+            sell_order: SELL order dict (decision_id filled in by caller) or None
+            proceeds: estimated cash freed if sold (0.0 on HOLD)
+        """
+        # Cheap guards first — nothing is fetched or computed until the
+        # holding is known to need evaluation
+        shares = int(data.get('qty', data.get('shares', 0)))
+        if shares <= 0:
+            return None
+
+        current_price = data.get('current_price') or self.fetch_price(ticker)
+        if not current_price:
+            return None
+
+        buy_price = data.get('avg_entry', data.get('buy_price', 0))
+
+        lines = []
+
+        # History fetch + fused indicator pass, shared with the buy filter
+        snap = self._snapshot(ticker)
+        atr_14, sma_20, sma_50 = snap['atr'], snap['sma_20'], snap['sma_50']
+
+        sell_reason = None
+
+        # ============================================================
+        # PILLAR 3: ATR-Based Stop-Loss + Breakeven + Trailing
+        # ============================================================
+        if atr_mult is None:
+            atr_mult = self.atr_multiplier
+
+        if atr_14 and atr_14 > 0:
+            stop_price = buy_price - (atr_mult * atr_14)
+        else:
+            # Fallback: flat 8% stop if ATR unavailable
+            stop_price = buy_price * 0.92
+
+        # --- BREAKEVEN RULE (P3) --- Persisted High Water Mark ---
+        # Once price hits +3%, breakeven is permanently locked via DB-persisted HWM.
+        # This survives across sessions: even if price drops back, stop stays at entry.
+        is_breakeven_active = False
+        is_trailing_active = False
+        peak_price_ever = current_price  # Default; updated below
+        if buy_price > 0:
+            # Read persisted HWM from DB — survives across sessions
+            persisted_hwm = trade_logger.get_high_water_mark(ticker)
+            # Only use persisted HWM + current live price.
+            # Do NOT use ohlc daily highs — they may include days before entry.
+            peak_price_ever = max(current_price, persisted_hwm or 0)
+
+            # Use HISTORICAL peak (not just current price) for activation checks
+            max_gain_pct = (peak_price_ever - buy_price) / buy_price
+
+            if max_gain_pct >= self.trailing_activation_pct:
+                # TRAILING STOP: 1.5% drop from persisted peak
+                trailing_stop = peak_price_ever * (1 - self.trailing_drop_pct)
+                if trailing_stop > stop_price:
+                    stop_price = trailing_stop
+                    is_trailing_active = True
+            elif max_gain_pct >= self.breakeven_trigger_pct:
+                # BREAKEVEN: once triggered by historical peak, NEVER reverts
+                if buy_price > stop_price:
+                    stop_price = buy_price
+                    is_breakeven_active = True
+
+        if current_price < stop_price:
+            drop_pct = (1 - current_price / buy_price) * 100
+            if is_trailing_active:
+                drop_from_peak = ((peak_price_ever - current_price) / peak_price_ever) * 100
+                sell_reason = (
+                    f"SELL: Trailing Stop hit ({drop_from_peak:.1f}% drop from peak ${peak_price_ever:.2f}) | "
+                    f"Entry: ${buy_price:.2f} → Current: ${current_price:.2f} | Stop: ${stop_price:.2f}"
+                )
+            elif is_breakeven_active:
+                sell_reason = (
+                    f"SELL: Breakeven Stop hit | "
+                    f"Entry: ${buy_price:.2f} → Current: ${current_price:.2f} | Stop: ${stop_price:.2f}"
+                )
+            elif atr_14:
+                sell_reason = (
+                    f"SELL: ATR Stop triggered (-{drop_pct:.1f}%) | "
+                    f"Entry: ${buy_price:.2f} → Current: ${current_price:.2f} | "
+                    f"Stop: ${stop_price:.2f} (ATR: {atr_14:.2f}, Mult: {atr_mult})"
+                )
             else:
-                # Fallback: flat 8% stop if ATR unavailable
-                stop_price = buy_price * 0.92
-            
-            # --- BREAKEVEN RULE (P3) --- Persisted High Water Mark ---
-            # Once price hits +3%, breakeven is permanently locked via DB-persisted HWM.
-            # This survives across sessions: even if price drops back, stop stays at entry.
-            is_breakeven_active = False
-            is_trailing_active = False
-            peak_price_ever = current_price  # Default; updated below
-            if buy_price > 0:
-                # Read persisted HWM from DB — survives across sessions
-                persisted_hwm = trade_logger.get_high_water_mark(ticker)
-                # Only use persisted HWM + current live price.
-                # Do NOT use ohlc daily highs — they may include days before entry.
-                peak_price_ever = max(current_price, persisted_hwm or 0)
-                
-                # Use HISTORICAL peak (not just current price) for activation checks
-                max_gain_pct = (peak_price_ever - buy_price) / buy_price
-                
-                if max_gain_pct >= self.trailing_activation_pct:
-                    # TRAILING STOP: 1.5% drop from persisted peak
-                    trailing_stop = peak_price_ever * (1 - self.trailing_drop_pct)
-                    if trailing_stop > stop_price:
-                        stop_price = trailing_stop
-                        is_trailing_active = True
-                elif max_gain_pct >= self.breakeven_trigger_pct:
-                    # BREAKEVEN: once triggered by historical peak, NEVER reverts
-                    if buy_price > stop_price:
-                        stop_price = buy_price
-                        is_breakeven_active = True
-            
-            if current_price < stop_price:
-                drop_pct = (1 - current_price / buy_price) * 100
-                if is_trailing_active:
-                    drop_from_peak = ((peak_price_ever - current_price) / peak_price_ever) * 100
-                    sell_reason = (
-                        f"SELL: Trailing Stop hit ({drop_from_peak:.1f}% drop from peak ${peak_price_ever:.2f}) | "
-                        f"Entry: ${buy_price:.2f} → Current: ${current_price:.2f} | Stop: ${stop_price:.2f}"
-                    )
-                elif is_breakeven_active:
-                    sell_reason = (
-                        f"SELL: Breakeven Stop hit | "
-                        f"Entry: ${buy_price:.2f} → Current: ${current_price:.2f} | Stop: ${stop_price:.2f}"
-                    )
-                elif atr_14:
-                    sell_reason = (
-                        f"SELL: ATR Stop triggered (-{drop_pct:.1f}%) | "
-                        f"Entry: ${buy_price:.2f} → Current: ${current_price:.2f} | "
-                        f"Stop: ${stop_price:.2f} (ATR: {atr_14:.2f}, Mult: {self.atr_multiplier})"
-                    )
-                else:
-                    sell_reason = (
-                        f"SELL: Hard Stop-Loss reached (-{drop_pct:.1f}%) | "
-                        f"Entry: ${buy_price:.2f} → Current: ${current_price:.2f} | "
-                        f"Threshold: 8% (ATR unavailable)"
-                    )
-            
-            # ============================================================
-            # PRIORITY 3: Whipsaw-Protected Trend Breakdown
-            # BOTH conditions required: Price < SMA20 AND SMA20 < SMA50
-            # ============================================================
-            if sell_reason is None and sma_20 and sma_50:
-                if current_price < sma_20 and sma_20 < sma_50:
-                    # Grace period: skip for new holdings (< 24h)
-                    last_buy = trade_logger.get_last_buy_time(ticker)
-                    hours_held = 999  # Default: assume long-held
-                    if last_buy:
-                        hours_held = (datetime.now() - last_buy).total_seconds() / 3600
-                    
-                    if hours_held < 24 and not getattr(self, '_panic_mode', False):
-                        gap_pct = ((sma_20 - current_price) / sma_20) * 100
-                        print(f"  \U0001f6e1\ufe0f {ticker}: Whipsaw Breakdown detected (gap {gap_pct:.1f}%) but GRACE PERIOD active ({hours_held:.1f}h < 24h). Holding.")
-                        trade_logger.log_decision({
+                sell_reason = (
+                    f"SELL: Hard Stop-Loss reached (-{drop_pct:.1f}%) | "
+                    f"Entry: ${buy_price:.2f} → Current: ${current_price:.2f} | "
+                    f"Threshold: 8% (ATR unavailable)"
+                )
+
+        # ============================================================
+        # PRIORITY 3: Whipsaw-Protected Trend Breakdown
+        # BOTH conditions required: Price < SMA20 AND SMA20 < SMA50
+        # ============================================================
+        if sell_reason is None and sma_20 and sma_50:
+            if current_price < sma_20 and sma_20 < sma_50:
+                # Grace period: skip for new holdings (< 24h)
+                last_buy = self._last_buy_time(ticker)
+                hours_held = 999  # Default: assume long-held
+                if last_buy:
+                    if now_ts is None:
+                        now_ts = time.time()
+                    hours_held = (now_ts - last_buy.timestamp()) / 3600
+
+                gap_pct = ((sma_20 - current_price) / sma_20) * 100
+                if hours_held < 24 and not getattr(self, '_panic_mode', False):
+                    lines.append(f"  \U0001f6e1️ {ticker}: Whipsaw Breakdown detected (gap {gap_pct:.1f}%) but GRACE PERIOD active ({hours_held:.1f}h < 24h). Holding.")
+                    return {
+                        'lines': lines,
+                        'log': {
                             'ticker': ticker, 'action': 'HOLD', 'quantity': shares,
                             'price': current_price, 'sma_20': sma_20, 'sma_50': sma_50,
                             'atr_14': atr_14, 'high_water_mark': peak_price_ever,
                             'decision_reason': f'Grace Period ({hours_held:.1f}h): Whipsaw breakdown suppressed'
-                        })
-                        continue  # Skip to next holding
-                    else:
-                        gap_pct = ((sma_20 - current_price) / sma_20) * 100
-                        sell_reason = (
-                            f"SELL: Trend Breakdown (Price ${current_price:.2f} < SMA20 ${sma_20:.2f} < SMA50 ${sma_50:.2f}, gap {gap_pct:.1f}%)"
-                        )
-            elif sell_reason is None and sma_20 and not sma_50:
-                # SMA50 data unavailable — log but do NOT trigger sell (whipsaw protection)
-                if current_price < sma_20:
-                    gap_pct = ((sma_20 - current_price) / sma_20) * 100
-                    print(f"  ⚠️ {ticker}: Price < SMA20 (gap {gap_pct:.1f}%) but SMA50 unavailable — Whipsaw protection: HOLDING.")
-            
-            # ============================================================
-            # PRIORITY 4: Time Stop — force-sell losing positions held too long
-            # ============================================================
-            if sell_reason is None and buy_price > 0 and current_price < buy_price:
-                last_buy = trade_logger.get_last_buy_time(ticker)
-                if last_buy:
-                    days_held = (datetime.now() - last_buy).days
-                    if days_held >= config.TIME_STOP_DAYS:
-                        loss_pct = ((buy_price - current_price) / buy_price) * 100
-                        sell_reason = (
-                            f"SELL: Time Stop ({days_held}d held, -{loss_pct:.1f}% loss) | "
-                            f"Entry: ${buy_price:.2f} → Current: ${current_price:.2f}"
-                        )
-            
-            # Calculate P&L for SELL
-            pnl = (current_price - buy_price) * shares
-            pnl_pct = ((current_price - buy_price) / buy_price) * 100 if buy_price > 0 else 0
-            
-            if sell_reason:
-                estimated_proceeds = current_price * shares
-                total_proceeds += estimated_proceeds
-                
-                print(f"  🚨 SELL ALERT for {ticker}: {sell_reason}")
-                print(f"     P&L: ${pnl:.2f} ({pnl_pct:.2f}%) | Est. Proceeds: ${estimated_proceeds:.2f}")
-                
-                # Use the persisted peak price (already computed above)
-                log_hwm = peak_price_ever
-                
-                risk_decision_id = trade_logger.log_decision({
+                        },
+                        'sell_order': None,
+                        'proceeds': 0.0
+                    }
+                else:
+                    sell_reason = (
+                        f"SELL: Trend Breakdown (Price ${current_price:.2f} < SMA20 ${sma_20:.2f} < SMA50 ${sma_50:.2f}, gap {gap_pct:.1f}%)"
+                    )
+        elif sell_reason is None and sma_20 and not sma_50:
+            # SMA50 data unavailable — log but do NOT trigger sell (whipsaw protection)
+            if current_price < sma_20:
+                gap_pct = ((sma_20 - current_price) / sma_20) * 100
+                lines.append(f"  ⚠️ {ticker}: Price < SMA20 (gap {gap_pct:.1f}%) but SMA50 unavailable — Whipsaw protection: HOLDING.")
+
+        # ============================================================
+        # PRIORITY 4: Time Stop — force-sell losing positions held too long
+        # ============================================================
+        if sell_reason is None and buy_price > 0 and current_price < buy_price:
+            last_buy = self._last_buy_time(ticker)
+            if last_buy:
+                if now_ts is None:
+                    now_ts = time.time()
+                days_held = int((now_ts - last_buy.timestamp()) // 86400)
+                if days_held >= config.TIME_STOP_DAYS:
+                    loss_pct = ((buy_price - current_price) / buy_price) * 100
+                    sell_reason = (
+                        f"SELL: Time Stop ({days_held}d held, -{loss_pct:.1f}% loss) | "
+                        f"Entry: ${buy_price:.2f} → Current: ${current_price:.2f}"
+                    )
+
+        # Calculate P&L for SELL
+        pnl = (current_price - buy_price) * shares
+        pnl_pct = ((current_price - buy_price) / buy_price) * 100 if buy_price > 0 else 0
+
+        if sell_reason:
+            estimated_proceeds = current_price * shares
+
+            lines.append(f"  🚨 SELL ALERT for {ticker}: {sell_reason}")
+            lines.append(f"     P&L: ${pnl:.2f} ({pnl_pct:.2f}%) | Est. Proceeds: ${estimated_proceeds:.2f}")
+
+            return {
+                'lines': lines,
+                'log': {
                     'ticker': ticker,
                     'action': 'SELL',
                     'quantity': shares,
@@ -401,38 +747,35 @@ class TradingLogic:
                     'sma_20': sma_20,
                     'sma_50': sma_50,
                     'atr_14': atr_14,
-                    'high_water_mark': log_hwm,
+                    'high_water_mark': peak_price_ever,  # Persisted peak, computed once above
                     'decision_reason': sell_reason,
                     'entry_price': buy_price,
                     'exit_price': current_price,
                     'pnl': pnl,
                     'pnl_percent': pnl_pct
-                })
-                
-                sell_orders.append({
-                    "ticker": ticker,
-                    "action": "sell",
-                    "quantity": shares,
-                    "order_type": "limit",
-                    "limit_price": current_price,
-                    "reason": sell_reason,
-                    "decision_id": risk_decision_id
-                })
-            else:
-                ta_status = ""
-                if sma_20: ta_status += f" | SMA20: ${sma_20:.2f}"
-                if sma_50: ta_status += f" | SMA50: ${sma_50:.2f}"
-                if atr_14: ta_status += f" | ATR: {atr_14:.2f}"
-                
-                status_msg = f"  ✅ {ticker} safe. (Curr: ${current_price} > Stop: ${stop_price:.2f}"
-                if is_trailing_active:
-                    status_msg += " 📈 Trailing Active"
-                elif is_breakeven_active:
-                    status_msg += " 🛡️ Breakeven Active"
-                status_msg += f"{ta_status})"
-                print(status_msg)
-                
-                trade_logger.log_decision({
+                },
+                'sell_order': Order(ticker=ticker, action="sell", quantity=shares,
+                                    order_type="limit", limit_price=current_price,
+                                    reason=sell_reason),
+                'proceeds': estimated_proceeds
+            }
+        else:
+            ta_status = ""
+            if sma_20: ta_status += f" | SMA20: ${sma_20:.2f}"
+            if sma_50: ta_status += f" | SMA50: ${sma_50:.2f}"
+            if atr_14: ta_status += f" | ATR: {atr_14:.2f}"
+
+            status_msg = f"  ✅ {ticker} safe. (Curr: ${current_price} > Stop: ${stop_price:.2f}"
+            if is_trailing_active:
+                status_msg += " 📈 Trailing Active"
+            elif is_breakeven_active:
+                status_msg += " 🛡️ Breakeven Active"
+            status_msg += f"{ta_status})"
+            lines.append(status_msg)
+
+            return {
+                'lines': lines,
+                'log': {
                     'ticker': ticker,
                     'action': 'HOLD',
                     'quantity': shares,
@@ -442,9 +785,10 @@ class TradingLogic:
                     'atr_14': atr_14,
                     'high_water_mark': peak_price_ever,
                     'decision_reason': f"Safe from ATR Stop & Trailing TP & Whipsaw Breakdown{ta_status}"
-                })
-                
-        return sell_orders, total_proceeds
+                },
+                'sell_order': None,
+                'proceeds': 0.0
+            }
 
     def check_budget_overflow(self, holdings_data, env_bias):
         """
@@ -457,7 +801,7 @@ class TradingLogic:
         # Add a 15% tolerance buffer so natural profit growth doesn't trigger micro-selling
         trim_threshold = max_capital_per_slot * 1.15
         
-        print(f"\n--- Checking Budget Overflow (Cap: ${max_capital_per_slot:.2f}, Threshold: ${trim_threshold:.2f}) ---")
+        self._log(f"\n--- Checking Budget Overflow (Cap: ${max_capital_per_slot:.2f}, Threshold: ${trim_threshold:.2f}) ---")
         
         for ticker, data in holdings_data.items():
             shares = int(data.get('qty', 0))
@@ -474,13 +818,13 @@ class TradingLogic:
             if market_value > trim_threshold:
                 # Calculate how many shares to sell to get back to exactly max_capital_per_slot
                 excess_value = market_value - max_capital_per_slot
-                shares_to_sell = math.floor(excess_value / current_price)
+                shares_to_sell = int(excess_value / current_price)
                 
                 if shares_to_sell > 0:
                     sell_reason = f"Budget Trim: Position Value ${market_value:.2f} exceeds cap ${max_capital_per_slot:.2f}. Trimming {shares_to_sell} shares."
-                    print(f"  ✂️ TRIM ALERT for {ticker}: {sell_reason}")
+                    self._log(f"  ✂️ TRIM ALERT for {ticker}: {sell_reason}")
                     
-                    sell_id = trade_logger.log_decision({
+                    sell_id = self._log_decision({
                         'ticker': ticker,
                         'action': 'SELL',
                         'quantity': shares_to_sell,
@@ -488,14 +832,10 @@ class TradingLogic:
                         'decision_reason': sell_reason
                     })
                     
-                    trim_orders.append({
-                        "ticker": ticker,
-                        "action": "sell",
-                        "quantity": shares_to_sell,
-                        "order_type": "market",  # Use market order for immediate trimming
-                        "reason": "Budget Trim (Overflow)",
-                        "decision_id": sell_id
-                    })
+                    # Market order for immediate trimming
+                    trim_orders.append(Order(ticker=ticker, action="sell",
+                        quantity=shares_to_sell, order_type="market",
+                        reason="Budget Trim (Overflow)", decision_id=sell_id))
                     
                     # Prevent future logic in generate_plan from acting like we still hold these
                     data['qty'] -= shares_to_sell
@@ -503,9 +843,28 @@ class TradingLogic:
         return trim_orders
 
     def generate_plan(self, sentiment_data, portfolio, env_bias=1.0, macro_reason=''):
-        """Five Pillars Execution Plan Generator (v2.1 — Graduated Risk Scaling)."""
-        print("\n--- Generating Execution Plan (Five Pillars v2.1) ---")
+        """Five Pillars Execution Plan Generator (v2.1 — Graduated Risk Scaling).
+
+        sentiment_data is expected prefiltered and prioritized by the caller
+        (main(): ticker present, action Buy/Sell, sorted by sentiment_score
+        descending) so slot fills see the strongest signals first. Raw,
+        unsorted input still works — the gather loop re-checks both fields.
+        """
+        try:
+            return self._generate_plan(sentiment_data, portfolio, env_bias, macro_reason)
+        finally:
+            # A mid-run crash must not discard the run's audit trail the
+            # way the old row-at-a-time writes never could: persist any
+            # decisions still queued. On the happy path _generate_plan has
+            # already flushed and both calls are no-ops.
+            self._flush_decisions(())
+            self._flush_log()
+
+    def _generate_plan(self, sentiment_data, portfolio, env_bias, macro_reason):
+        self._log("\n--- Generating Execution Plan (Five Pillars v2.1) ---")
         orders = []
+        self._decision_buffer = []  # Batch all DB writes for this run
+        self._log_lines = []   # Batch all status output for this run
         self._env_bias = env_bias
         self._macro_reason = macro_reason
         
@@ -516,10 +875,13 @@ class TradingLogic:
         risk_scaled_slots = self.max_slots
         min_entry_score = 0.45  # Default minimum
         risk_label = "🟢 NORMAL"
-        
+        # Local effective multiplier — the instance attribute is never mutated,
+        # so a tier tightening can't leak into later plan runs
+        effective_atr_mult = self.atr_multiplier
+
         if safe_hold_mode:
-            print(f"  🚨 SAFE HOLD MODE ACTIVE — Reason: {macro_reason}")
-            self.atr_multiplier = config.ATR_MULTIPLIER * config.ATR_MULTIPLIER_CRITICAL
+            self._log(f"  🚨 SAFE HOLD MODE ACTIVE — Reason: {macro_reason}")
+            effective_atr_mult = config.ATR_MULTIPLIER * config.ATR_MULTIPLIER_CRITICAL
         else:
             for threshold, max_slots, min_score in config.RISK_TIERS:
                 if env_bias < threshold:
@@ -536,20 +898,20 @@ class TradingLogic:
                     original_min = min_entry_score
                     min_entry_score = max(min_entry_score - decay, config.ELEVATED_MIN_FLOOR)
                     if min_entry_score < original_min:
-                        print(f"  📉 ELEVATED Decay: {elevated_days}d consecutive → min_score {original_min:.2f} → {min_entry_score:.2f}")
+                        self._log(f"  📉 ELEVATED Decay: {elevated_days}d consecutive → min_score {original_min:.2f} → {min_entry_score:.2f}")
             
             if env_bias < 0.3:
                 risk_label = "🔴 CRITICAL"
-                self.atr_multiplier = config.ATR_MULTIPLIER * config.ATR_MULTIPLIER_CRITICAL
+                effective_atr_mult = config.ATR_MULTIPLIER * config.ATR_MULTIPLIER_CRITICAL
             elif env_bias < 0.5:
                 risk_label = "🟠 ELEVATED"
-                self.atr_multiplier = config.ATR_MULTIPLIER * config.ATR_MULTIPLIER_ELEVATED
+                effective_atr_mult = config.ATR_MULTIPLIER * config.ATR_MULTIPLIER_ELEVATED
             elif env_bias < 0.8:
                 risk_label = "🟡 CAUTIOUS"
         
-        print(f"  {risk_label} (env_bias={env_bias:.2f}) | Max Slots: {risk_scaled_slots} | Min Score: {min_entry_score:.2f}")
+        self._log(f"  {risk_label} (env_bias={env_bias:.2f}) | Max Slots: {risk_scaled_slots} | Min Score: {min_entry_score:.2f}")
         if macro_reason:
-            print(f"  📰 Macro: {macro_reason[:120]}")
+            self._log(f"  📰 Macro: {macro_reason[:120]}")
 
         # ── 1. Fetch Positions ──
         current_holdings_data = {}
@@ -562,20 +924,42 @@ class TradingLogic:
                         'market_value': float(p.market_value), 'current_price': float(p.current_price)
                     }
             except Exception as e:
-                print(f"  ⚠️ Error fetching positions: {e}")
+                self._log(f"  ⚠️ Error fetching positions: {e}")
                 for ticker, data in portfolio.get('positions', {}).items():
                     current_holdings_data[ticker] = {'qty': data['shares'], 'avg_entry': data['buy_price']}
         
         num_positions = len([t for t, d in current_holdings_data.items() if d.get('qty', 0) > 0])
         open_slots = max(0, min(risk_scaled_slots, self.max_slots) - num_positions)
-        print(f"  📊 Slots: {num_positions}/{self.max_slots} used | {open_slots} open (risk-adjusted max: {risk_scaled_slots})")
+        self._log(f"  📊 Slots: {num_positions}/{self.max_slots} used | {open_slots} open (risk-adjusted max: {risk_scaled_slots})")
+
+        # ── 2. Bulk prefetch: holdings + every actionable signal ticker ──
+        plan_tickers = (
+            set(current_holdings_data)
+            | {s.get('ticker') for s in sentiment_data
+               if s.get('action') in ('Buy', 'Sell') and s.get('ticker')})
+        self._price_cache = {}  # Fresh quotes each plan run
+        self._indicator_snapshot = {}  # Fresh technical snapshots each plan run
+        self.fetch_prices_bulk(plan_tickers)
+        self.fetch_history_bulk(plan_tickers)
+        # One grouped SQLite query instead of 2 round-trips per ticker for
+        # last-buy times (risk checks) and latest scores (holdings scoring)
+        self._ticker_state = trade_logger.get_ticker_state_bulk(plan_tickers)
+        # Likewise one IN(...) query instead of a blacklist probe per Buy
+        # candidate; the R4 bias override is applied at the check site
+        self._blacklisted = trade_logger.get_blacklisted_tickers(
+            {s.get('ticker') for s in sentiment_data
+             if s.get('action') == 'Buy' and s.get('ticker')})
 
         # ── 3. P3: Risk Checks (+ Time Stop) ──
-        risk_sells, risk_proceeds = self.check_portfolio_risks(current_holdings_data)
+        risk_sells, risk_proceeds = self.check_portfolio_risks(current_holdings_data, atr_mult=effective_atr_mult)
         orders.extend(risk_sells)
         
         # ── 3.1 FIX: Initialize sold_tickers early — all downstream logic reads this ──
-        sold_tickers = [o['ticker'] for o in risk_sells]
+        # Set, not an index bitmask: membership is probed by ticker symbol
+        # from the candidate side (candidates have no holding index), and
+        # risk sells land here before any holding ordering exists. O(1)
+        # per check either way.
+        sold_tickers = {o.ticker for o in risk_sells}
         
         # Immediately remove sold tickers from holdings so they don't block slots or appear in further logic
         for ticker in sold_tickers:
@@ -592,17 +976,19 @@ class TradingLogic:
 
         # ── 4. Safe Hold: freeze all buys (only for env_bias == 0.0) ──
         if safe_hold_mode:
-            print(f"\n  🚨 SAFE HOLD: All buys frozen.")
-            trade_logger.log_decision({
+            self._log(f"\n  🚨 SAFE HOLD: All buys frozen.")
+            self._log_decision({
                 'ticker': 'SYSTEM', 'action': 'DEFENSE_MODE', 'price': 0,
                 'decision_reason': f'SAFE HOLD: env_bias=0.00. Reason: {macro_reason}',
                 'env_bias': env_bias, 'macro_reason': macro_reason
             })
+            self._flush_decisions(orders)
+            self._flush_log()
             return orders
         
         # Log risk tier for non-normal modes (for tracking)
         if env_bias < 0.8:
-            trade_logger.log_decision({
+            self._log_decision({
                 'ticker': 'SYSTEM', 'action': 'RISK_SCALED', 'price': 0,
                 'decision_reason': f'{risk_label}: env_bias={env_bias:.2f}, slots={risk_scaled_slots}, min_score={min_entry_score:.2f}. Reason: {macro_reason}',
                 'env_bias': env_bias, 'macro_reason': macro_reason
@@ -610,7 +996,7 @@ class TradingLogic:
 
         # ── 4.5 Sentiment-Driven Sell: Act on audited negative signals for held tickers ──
         SELL_SENTIMENT_THRESHOLD = -0.4  # Only act on strong negative signals
-        print("\n--- Checking Sell Signals Against Holdings ---")
+        self._log("\n--- Checking Sell Signals Against Holdings ---")
         for signal in sentiment_data:
             if signal.get('action') != 'Sell':
                 continue
@@ -639,21 +1025,19 @@ class TradingLogic:
                 f"score={sent_score:.2f} ≤ {SELL_SENTIMENT_THRESHOLD}. "
                 f"Reason: {signal.get('reasoning', 'N/A')[:100]}"
             )
-            print(f"  🔻 SENTIMENT SELL: {sig_ticker} ({sell_reason})")
+            self._log(f"  🔻 SENTIMENT SELL: {sig_ticker} ({sell_reason})")
             
-            sid = trade_logger.log_decision({
+            sid = self._log_decision({
                 'ticker': sig_ticker, 'action': 'SELL', 'quantity': shares,
                 'price': cp, 'sentiment_score': sent_score,
                 'duration_score': signal.get('duration_score'),
                 'weighted_score': sent_score,
                 'decision_reason': sell_reason
             })
-            orders.append({
-                "ticker": sig_ticker, "action": "sell", "quantity": shares,
-                "order_type": "limit", "limit_price": cp,
-                "reason": sell_reason, "decision_id": sid
-            })
-            sold_tickers.append(sig_ticker)
+            orders.append(Order(ticker=sig_ticker, action="sell", quantity=shares,
+                order_type="limit", limit_price=cp,
+                reason=sell_reason, decision_id=sid))
+            sold_tickers.add(sig_ticker)
             del current_holdings_data[sig_ticker]
             
             # Recalculate open slots
@@ -661,90 +1045,122 @@ class TradingLogic:
             open_slots = max(0, risk_scaled_slots - num_positions)
         
 
-        candidates = []
+        # ── Candidate gather: network/DB gates first (validation, blacklist,
+        # price, snapshot), building parallel rows for the vector filter ──
+        prospects = []
         for signal in sentiment_data:
             if signal.get('action') != 'Buy':
                 continue
             ticker = signal.get('ticker')
             if not ticker or not self.validate_ticker(ticker):
-                trade_logger.log_decision({'ticker': ticker or 'UNKNOWN', 'action': 'SKIP', 'price': 0,
+                self._log_decision({'ticker': ticker or 'UNKNOWN', 'action': 'SKIP', 'price': 0,
                     'decision_reason': 'SKIP: Not tradable on Alpaca'})
                 continue
-            
+
             bias = signal.get('sentiment_score', 0)
-            if trade_logger.is_blacklisted(ticker, current_bias=bias):
-                print(f"  🚫 {ticker}: 30-day blacklisted")
-                trade_logger.log_decision({'ticker': ticker, 'action': 'SKIP', 'price': 0,
+            # Prefetched verdict + R4 News Override (bias beats blacklist)
+            if ticker in self._blacklisted and bias < config.BLACKLIST_OVERRIDE_BIAS:
+                self._log(f"  🚫 {ticker}: 30-day blacklisted")
+                self._log_decision({'ticker': ticker, 'action': 'SKIP', 'price': 0,
                     'sentiment_score': bias, 'decision_reason': 'SKIP: 30-day blacklist'})
                 continue
-            
+
             price = self.fetch_price(ticker)
             if not price:
                 continue
-            
-            ohlc = self.fetch_history(ticker)
-            atr = self.calculate_atr(ohlc, self.atr_period) if ohlc is not None else None
-            rsi, sma_20, sma_50 = None, None, None
-            if ohlc is not None:
-                close_series = ohlc['close']
-                rsi = self.calculate_rsi(close_series, 14)
-                sma_20 = self.calculate_sma(close_series, 20)
-                sma_50 = self.calculate_sma(close_series, 50)
-            
+
+            # Snapshot hit when the ticker was already evaluated as a holding
+            prospects.append((ticker, bias, price, self._snapshot(ticker), signal))
+
+        # ── Technical filters: one vectorized NumPy pass over all prospects
+        # (SoA arrays, None → NaN; NaN fails every comparison, which matches
+        # the scalar None-guards) instead of per-candidate Python branches ──
+        candidates = []
+        if prospects:
+            prices = np.array([p[2] for p in prospects], dtype=np.float64)
+            atrs = np.array([p[3]['atr'] or np.nan for p in prospects], dtype=np.float64)
+            sma20s = np.array([p[3]['sma_20'] or np.nan for p in prospects], dtype=np.float64)
+            sma50s = np.array([p[3]['sma_50'] or np.nan for p in prospects], dtype=np.float64)
+            rsis = np.array([np.nan if p[3]['rsi'] is None else p[3]['rsi'] for p in prospects], dtype=np.float64)
+
             # P2: Volatility hard filter
-            if atr and price and atr / price > self.max_volatility_pct:
-                print(f"  🚫 {ticker}: Too volatile (ATR/Price={atr/price*100:.1f}%)")
-                trade_logger.log_decision({'ticker': ticker, 'action': 'SKIP', 'price': price,
+            vol_reject = (atrs > 0) & (atrs / prices > self.max_volatility_pct)
+            # RSI filter
+            rsi_reject = (rsis > 75) | ((rsis >= 65) & (prices <= sma20s))
+            # Downtrend filter (strong): price < SMA20 AND SMA20 < SMA50,
+            # unless oversold (RSI < 35)
+            down_reject = (prices < sma20s) & (sma20s < sma50s) & ~(rsis < 35)
+            # [P1] Momentum filter: >tolerance below SMA20 = weak short-term
+            # momentum, even without a full downtrend. The gap array is kept
+            # for the reject branches below, which only format it for the
+            # few prospects that actually get logged.
+            gap_pcts = ((sma20s - prices) / sma20s) * 100
+            momentum_reject = gap_pcts > config.MOMENTUM_GAP_TOLERANCE * 100
+
+            # Weighted scores + position sizes in the same SoA pass. Fresh
+            # entries have return_pct 0, so the capped-return term drops out
+            # of the Five Pillars formula; sizing mirrors
+            # calculate_position_size (min of ATR risk parity and slot cap,
+            # zeroed when ATR is missing or the volatility filter trips).
+            biases = np.array([p[1] or 0 for p in prospects], dtype=np.float64)
+            norm_atr = np.where(atrs > 0, np.minimum(atrs / prices, 1.0), 1.0)
+            cand_scores = 0.4 * biases + 0.3 * (1.0 - norm_atr)
+
+            atr_qtys = (self.budget * self.risk_per_trade_pct) / (2 * atrs)
+            cap_qtys = ((self.budget / self.max_slots) * self._env_bias) / prices
+            cand_qtys = np.where(
+                (atrs > 0) & (atrs / prices <= self.max_volatility_pct),
+                np.floor(np.minimum(atr_qtys, cap_qtys)), 0).astype(np.int64)
+
+        for i, (ticker, bias, price, snap, signal) in enumerate(prospects):
+            atr, sma_20, sma_50, rsi = snap['atr'], snap['sma_20'], snap['sma_50'], snap['rsi']
+
+            if vol_reject[i]:
+                self._log(f"  🚫 {ticker}: Too volatile (ATR/Price={atr/price*100:.1f}%)")
+                self._log_decision({'ticker': ticker, 'action': 'SKIP', 'price': price,
                     'sentiment_score': bias, 'atr_14': atr,
                     'decision_reason': f'SKIP: Volatility {atr/price*100:.1f}% > {self.max_volatility_pct*100:.0f}%'})
                 continue
-            
-            # RSI filter
-            if rsi is not None and (rsi > 75 or (rsi >= 65 and sma_20 and price <= sma_20)):
-                print(f"  ⚠️ {ticker}: RSI overbought ({rsi:.1f})")
-                trade_logger.log_decision({'ticker': ticker, 'action': 'SKIP', 'price': price,
+
+            if rsi_reject[i]:
+                self._log(f"  ⚠️ {ticker}: RSI overbought ({rsi:.1f})")
+                self._log_decision({'ticker': ticker, 'action': 'SKIP', 'price': price,
                     'sentiment_score': bias, 'rsi_14': rsi,
                     'decision_reason': f'SKIP: RSI {rsi:.1f}'})
                 continue
-            
-            # Downtrend filter (strong): price < SMA20 AND SMA20 < SMA50
-            if sma_20 and sma_50 and price < sma_20 and sma_20 < sma_50:
-                is_oversold = rsi is not None and rsi < 35
-                if not is_oversold:
-                    gap_pct = ((sma_20 - price) / sma_20) * 100
-                    print(f"  🚫 {ticker}: Downtrend (gap {gap_pct:.1f}%)")
-                    trade_logger.log_decision({'ticker': ticker, 'action': 'SKIP', 'price': price,
-                        'sentiment_score': bias, 'rsi_14': rsi, 'sma_20': sma_20, 'sma_50': sma_50,
-                        'decision_reason': f'SKIP: Downtrend gap {gap_pct:.1f}%'})
-                    continue
-            
-            # [P1] Momentum filter: block entry if price significantly below SMA20
-            # Even if SMA20 > SMA50 (not a full downtrend), being >2% below SMA20
-            # indicates weak short-term momentum — most such entries lost money.
-            if sma_20 and price < sma_20:
-                gap_pct = ((sma_20 - price) / sma_20) * 100
-                if gap_pct > config.MOMENTUM_GAP_TOLERANCE * 100:
-                    print(f"  🚫 {ticker}: Below SMA20 by {gap_pct:.1f}% (tolerance: {config.MOMENTUM_GAP_TOLERANCE*100:.0f}%)")
-                    trade_logger.log_decision({'ticker': ticker, 'action': 'SKIP', 'price': price,
-                        'sentiment_score': bias, 'rsi_14': rsi, 'sma_20': sma_20,
-                        'decision_reason': f'SKIP: Momentum filter — price {gap_pct:.1f}% below SMA20'})
-                    continue
-            
-            score = self.calculate_weighted_score(bias, 0, atr or 0, price)
-            
+
+            if down_reject[i]:
+                gap_pct = gap_pcts[i]
+                self._log(f"  🚫 {ticker}: Downtrend (gap {gap_pct:.1f}%)")
+                self._log_decision({'ticker': ticker, 'action': 'SKIP', 'price': price,
+                    'sentiment_score': bias, 'rsi_14': rsi, 'sma_20': sma_20, 'sma_50': sma_50,
+                    'decision_reason': f'SKIP: Downtrend gap {gap_pct:.1f}%'})
+                continue
+
+            if momentum_reject[i]:
+                gap_pct = gap_pcts[i]
+                self._log(f"  🚫 {ticker}: Below SMA20 by {gap_pct:.1f}% (tolerance: {config.MOMENTUM_GAP_TOLERANCE*100:.0f}%)")
+                self._log_decision({'ticker': ticker, 'action': 'SKIP', 'price': price,
+                    'sentiment_score': bias, 'rsi_14': rsi, 'sma_20': sma_20,
+                    'decision_reason': f'SKIP: Momentum filter — price {gap_pct:.1f}% below SMA20'})
+                continue
+
+            score = float(cand_scores[i])
+
             # Min entry score filter (graduated by risk tier)
             if score < min_entry_score:
-                print(f"  🚫 {ticker}: Score {score:.3f} < min {min_entry_score:.2f}")
-                trade_logger.log_decision({'ticker': ticker, 'action': 'SKIP', 'price': price,
+                self._log(f"  🚫 {ticker}: Score {score:.3f} < min {min_entry_score:.2f}")
+                self._log_decision({'ticker': ticker, 'action': 'SKIP', 'price': price,
                     'sentiment_score': bias, 'weighted_score': score,
                     'decision_reason': f'SKIP: Score {score:.3f} < risk-tier min {min_entry_score:.2f}'})
                 continue
-            
-            qty = self.calculate_position_size(atr or 0, price, self._env_bias)
-            
+
+            qty = int(cand_qtys[i])
+
             # Compute 5-day SMA for momentum filter (used in swap/replace decisions)
+            ohlc = snap['ohlc']
             sma_5 = self.calculate_sma(ohlc['close'], config.MOMENTUM_SMA_PERIOD) if ohlc is not None and len(ohlc) >= config.MOMENTUM_SMA_PERIOD else None
-            
+
             candidates.append({
                 'ticker': ticker, 'score': score, 'price': price, 'qty': qty,
                 'bias': bias, 'atr': atr, 'rsi': rsi, 'sma_20': sma_20, 'sma_50': sma_50,
@@ -770,7 +1186,7 @@ class TradingLogic:
                         seen_tickers[t] = cand
                         
         if len(seen_tickers) < len(candidates):
-            print(f"  🔀 Deduplicated candidates: {len(candidates)} → {len(seen_tickers)} (removed {len(candidates) - len(seen_tickers)} duplicates)")
+            self._log(f"  🔀 Deduplicated candidates: {len(candidates)} → {len(seen_tickers)} (removed {len(candidates) - len(seen_tickers)} duplicates)")
         
         candidates = sorted(seen_tickers.values(), key=lambda x: x['score'], reverse=True)
         
@@ -782,89 +1198,114 @@ class TradingLogic:
             cp = data.get('current_price') or self.fetch_price(ticker)
             ae = data.get('avg_entry', cp)
             ret = (cp - ae) / ae if ae > 0 else 0
-            ohlc = self.fetch_history(ticker)
-            atr = self.calculate_atr(ohlc, self.atr_period) if ohlc is not None else None
-            scores = trade_logger.get_latest_scores(ticker)
+            atr = self._snapshot(ticker)['atr']
+            scores = self._latest_scores(ticker)
             sc = self.calculate_weighted_score(scores['sentiment'], ret, atr or 0, cp or 1)
             holdings_scored.append({'ticker': ticker, 'score': sc, 'qty': data['qty'], 'price': cp, 'avg_entry': ae})
         
         holdings_scored.sort(key=lambda x: x['score'])
         
-        print(f"\n--- Candidates: {len(candidates)} | Holdings: {len(holdings_scored)} ---")
+        self._log(f"\n--- Candidates: {len(candidates)} | Holdings: {len(holdings_scored)} ---")
         for c in candidates[:5]:
-            print(f"  📈 {c['ticker']}: Score={c['score']:.3f} Qty={c['qty']} ${c['price']:.2f}")
+            self._log(f"  📈 {c['ticker']}: Score={c['score']:.3f} Qty={c['qty']} ${c['price']:.2f}")
         for h in holdings_scored:
             ret_pct = ((h['price']-h['avg_entry'])/h['avg_entry']*100) if h['avg_entry'] > 0 else 0
-            print(f"  📦 {h['ticker']}: Score={h['score']:.3f} Qty={int(h['qty'])} Ret={ret_pct:.1f}%")
+            self._log(f"  📦 {h['ticker']}: Score={h['score']:.3f} Qty={int(h['qty'])} Ret={ret_pct:.1f}%")
 
         # ── 6.5 Strict Slot Enforcement (Purge Excess) ──
         # If we have more than risk_scaled_slots, sell the weakest ones until we are at risk_scaled_slots
         excess_slots = len(holdings_scored) - risk_scaled_slots
         if excess_slots > 0:
-            print(f"\n  🧹 Slot Purge: {len(holdings_scored)} active > {risk_scaled_slots} risk-adjusted limit. Selling {excess_slots} weakest.")
+            self._log(f"\n  🧹 Slot Purge: {len(holdings_scored)} active > {risk_scaled_slots} risk-adjusted limit. Selling {excess_slots} weakest.")
             for i in range(excess_slots):
                 weakest = holdings_scored.pop(0)  # Remove and get the lowest score
                 sq = int(weakest['qty'])
-                sid = trade_logger.log_decision({
+                sid = self._log_decision({
                     'ticker': weakest['ticker'], 'action': 'SELL', 'quantity': sq,
                     'price': weakest['price'], 'weighted_score': weakest['score'],
                     'decision_reason': f'Slot Purge: Enforcing risk-scaled max {risk_scaled_slots} slots'})
-                orders.append({"ticker": weakest['ticker'], "action": "sell", "quantity": sq,
-                    "order_type": "limit", "limit_price": weakest['price'],
-                    "reason": f"Slot limit enforced ({risk_scaled_slots})", "decision_id": sid})
+                orders.append(Order(ticker=weakest['ticker'], action="sell", quantity=sq,
+                    order_type="limit", limit_price=weakest['price'],
+                    reason=f"Slot limit enforced ({risk_scaled_slots})", decision_id=sid))
                 # Prevent this ticker from blocking buys later
-                sold_tickers.append(weakest['ticker'])
+                sold_tickers.add(weakest['ticker'])
                 if weakest['ticker'] in current_holdings_data:
                     del current_holdings_data[weakest['ticker']]
-                print(f"    ❌ Purged {weakest['ticker']} (Score: {weakest['score']:.3f})")
+                self._log(f"    ❌ Purged {weakest['ticker']} (Score: {weakest['score']:.3f})")
             open_slots = 0  # We are exactly at max slots now
         else:
             open_slots = risk_scaled_slots - len(holdings_scored)
         
         # sold_tickers is already maintained from risk sells + purge sells above
         bought_this_session = set()  # [BUG FIX] Prevent same ticker bought twice in one session
-        
+
+        # Loop invariants, hoisted out of the candidate loop
+        slot_cap = (self.budget / self.max_slots) * self._env_bias
+        scaled_min_order_value = self.min_order_value * self._env_bias
+        full_replace_threshold = self.full_replace_threshold
+
+        # Bound-method hoists: LOAD_FAST beats LOAD_ATTR in the per-candidate loop
+        log_decision = self._log_decision
+        log = self._log
+
+        # Suffix minimum of candidate prices: once the per-slot budget can't
+        # fund a single share of even the cheapest remaining candidate, every
+        # later iteration would just log a zero-qty skip — break instead
+        if candidates:
+            cheapest_rest = np.minimum.accumulate(
+                np.array([c['price'] for c in candidates], dtype=np.float64)[::-1])[::-1]
+
         # ── 7. Execute: Fill slots → Replacements ──
-        for cand in candidates:
+        for i, cand in enumerate(candidates):
+            # Unpack each candidate once — the log payloads below would
+            # otherwise re-index the same dict up to four times per entry
             ticker, price, qty, score = cand['ticker'], cand['price'], cand['qty'], cand['score']
-            
+            bias = cand['bias']
+            cand_atr, cand_rsi = cand.get('atr'), cand.get('rsi')
+            cand_sma20, cand_sma50, cand_sma5 = cand.get('sma_20'), cand.get('sma_50'), cand.get('sma_5')
+
+            if slot_cap < cheapest_rest[i]:
+                log(f"  ⛔ Ending scan: slot budget £{slot_cap:.0f} can't fund any remaining candidate (cheapest ${cheapest_rest[i]:.2f})")
+                log_decision({'ticker': 'SYSTEM', 'action': 'SKIP', 'price': 0,
+                    'decision_reason': f'SKIP: Slot budget £{slot_cap:.0f} below cheapest remaining candidate ${cheapest_rest[i]:.2f} — {len(candidates) - i} candidates unfunded'})
+                break
+
             if ticker in sold_tickers:
                 continue
             if ticker in bought_this_session:
                 continue
             if ticker in current_holdings_data and current_holdings_data[ticker].get('qty', 0) > 0:
                 continue
-            
+
             # [BUG FIX] Pre-cap qty to slot budget BEFORE ordering
-            slot_cap = (self.budget / self.max_slots) * self._env_bias
-            max_affordable_qty = math.floor(slot_cap / price) if price > 0 else 0
+            # (int(a // b) rather than math.floor(a / b) — both are positive)
+            max_affordable_qty = int(slot_cap // price) if price > 0 else 0
             qty = min(qty, max_affordable_qty)
             
             # P4: Min order value (Scaled by env_bias to avoid blocking trades during low-bias periods)
             order_value = qty * price if qty > 0 else 0
-            scaled_min_order_value = self.min_order_value * self._env_bias
             if qty <= 0 or order_value < scaled_min_order_value:
-                print(f"  🚫 {ticker}: Order £{order_value:.0f} < min £{scaled_min_order_value:.0f}")
-                trade_logger.log_decision({'ticker': ticker, 'action': 'SKIP', 'price': price,
-                    'sentiment_score': cand['bias'], 'weighted_score': score,
+                log(f"  🚫 {ticker}: Order £{order_value:.0f} < min £{scaled_min_order_value:.0f}")
+                log_decision({'ticker': ticker, 'action': 'SKIP', 'price': price,
+                    'sentiment_score': bias, 'weighted_score': score,
                     'decision_reason': f'SKIP: Order £{order_value:.0f} < min £{scaled_min_order_value:.0f} (P4)'})
                 continue
             
             # OPEN SLOT
             if open_slots > 0:
                 reason = f"Slot Fill (Score {score:.3f}, {qty} shares)"
-                did = trade_logger.log_decision({
+                did = log_decision({
                     'ticker': ticker, 'action': 'BUY', 'quantity': qty, 'price': price,
-                    'sentiment_score': cand['bias'], 'rsi_14': cand.get('rsi'),
-                    'sma_20': cand.get('sma_20'), 'sma_50': cand.get('sma_50'),
-                    'atr_14': cand.get('atr'), 'decision_reason': reason, 'weighted_score': score
+                    'sentiment_score': bias, 'rsi_14': cand_rsi,
+                    'sma_20': cand_sma20, 'sma_50': cand_sma50,
+                    'atr_14': cand_atr, 'decision_reason': reason, 'weighted_score': score
                 })
-                orders.append({"ticker": ticker, "action": "buy", "quantity": qty,
-                    "order_type": "limit", "limit_price": price, "reason": reason, "decision_id": did})
+                orders.append(Order(ticker=ticker, action="buy", quantity=qty,
+                    order_type="limit", limit_price=price, reason=reason, decision_id=did))
                 open_slots -= 1
                 bought_this_session.add(ticker)
                 current_holdings_data[ticker] = {'qty': qty, 'avg_entry': price, 'current_price': price}
-                print(f"  ✅ BUY {qty} {ticker} @ ${price:.2f} [DB#{did}]")
+                log(f"  ✅ BUY {qty} {ticker} @ ${price:.2f} [DB#{did}]")
                 continue
             
             # ALL SLOTS FULL
@@ -872,65 +1313,68 @@ class TradingLogic:
                 break
             weakest = holdings_scored[0]
             ws = weakest['score']
-            
+            # Replacement gate folded to one comparison: a dead slot
+            # (ws <= 0.01) always yields, which -inf expresses directly
+            ws_gate = float('-inf') if ws <= 0.01 else ws * full_replace_threshold
+
             # Momentum filter: block swap/replace if target has negative 5-day momentum
-            sma_5 = cand.get('sma_5')
-            if sma_5 and price < sma_5:
-                print(f"  🚫 {ticker}: Negative 5d momentum (${price:.2f} < SMA5 ${sma_5:.2f}) — swap/replace blocked")
-                trade_logger.log_decision({'ticker': ticker, 'action': 'SKIP', 'price': price,
-                    'sentiment_score': cand['bias'], 'weighted_score': score,
-                    'decision_reason': f'SKIP: Negative 5d momentum ${price:.2f} < SMA5 ${sma_5:.2f}'})
+            if cand_sma5 and price < cand_sma5:
+                log(f"  🚫 {ticker}: Negative 5d momentum (${price:.2f} < SMA5 ${cand_sma5:.2f}) — swap/replace blocked")
+                log_decision({'ticker': ticker, 'action': 'SKIP', 'price': price,
+                    'sentiment_score': bias, 'weighted_score': score,
+                    'decision_reason': f'SKIP: Negative 5d momentum ${price:.2f} < SMA5 ${cand_sma5:.2f}'})
                 continue
             
             # [P3] Trend confirmation for swap/replace: target must be above SMA20
             # DeepSeek data: 5/5 Full Replace trades lost money — all entered weak trends
-            cand_sma20 = cand.get('sma_20')
             if cand_sma20 and price < cand_sma20:
                 gap_pct = ((cand_sma20 - price) / cand_sma20) * 100
-                print(f"  🚫 {ticker}: Replace blocked — below SMA20 by {gap_pct:.1f}% (no uptrend confirmation)")
-                trade_logger.log_decision({'ticker': ticker, 'action': 'SKIP', 'price': price,
-                    'sentiment_score': cand['bias'], 'weighted_score': score,
+                log(f"  🚫 {ticker}: Replace blocked — below SMA20 by {gap_pct:.1f}% (no uptrend confirmation)")
+                log_decision({'ticker': ticker, 'action': 'SKIP', 'price': price,
+                    'sentiment_score': bias, 'weighted_score': score,
                     'decision_reason': f'SKIP: Replace blocked — price {gap_pct:.1f}% below SMA20'})
                 continue
             
             # P1: Full replacement (≥20%)
-            if ws <= 0.01 or score >= ws * self.full_replace_threshold:
-                print(f"  🔄 FULL REPLACE: {ticker}({score:.3f}) >> {weakest['ticker']}({ws:.3f})")
+            if score >= ws_gate:
+                log(f"  🔄 FULL REPLACE: {ticker}({score:.3f}) >> {weakest['ticker']}({ws:.3f})")
                 sq = int(weakest['qty'])
-                sid = trade_logger.log_decision({
+                sid = log_decision({
                     'ticker': weakest['ticker'], 'action': 'SELL', 'quantity': sq,
                     'price': weakest['price'], 'weighted_score': ws,
                     'decision_reason': f'Full Replace by {ticker} ({ws:.3f}→{score:.3f})'})
-                orders.append({"ticker": weakest['ticker'], "action": "sell", "quantity": sq,
-                    "order_type": "limit", "limit_price": weakest['price'],
-                    "reason": f"Full Replace by {ticker}", "decision_id": sid})
-                sold_tickers.append(weakest['ticker'])
+                orders.append(Order(ticker=weakest['ticker'], action="sell", quantity=sq,
+                    order_type="limit", limit_price=weakest['price'],
+                    reason=f"Full Replace by {ticker}", decision_id=sid))
+                sold_tickers.add(weakest['ticker'])
                 
-                bid = trade_logger.log_decision({
+                bid = log_decision({
                     'ticker': ticker, 'action': 'BUY', 'quantity': qty, 'price': price,
-                    'sentiment_score': cand['bias'], 'atr_14': cand.get('atr'),
+                    'sentiment_score': bias, 'atr_14': cand_atr,
                     'decision_reason': f'Full Replace of {weakest["ticker"]}', 'weighted_score': score})
-                orders.append({"ticker": ticker, "action": "buy", "quantity": qty,
-                    "order_type": "limit", "limit_price": price,
-                    "reason": f"Full Replace of {weakest['ticker']}", "decision_id": bid,
-                    "paired_sell_ticker": weakest['ticker']})
+                orders.append(Order(ticker=ticker, action="buy", quantity=qty,
+                    order_type="limit", limit_price=price,
+                    reason=f"Full Replace of {weakest['ticker']}", decision_id=bid,
+                    paired_sell_ticker=weakest['ticker']))
                 holdings_scored.pop(0)
                 bought_this_session.add(ticker)
                 current_holdings_data[ticker] = {'qty': qty, 'avg_entry': price, 'current_price': price}
-                print(f"  ✅ Sell {sq} {weakest['ticker']} → Buy {qty} {ticker}")
+                log(f"  ✅ Sell {sq} {weakest['ticker']} → Buy {qty} {ticker}")
                 continue
             
-            print(f"  ⏭️ {ticker}: Score {score:.3f} < threshold for {weakest['ticker']} ({ws:.3f})")
-            trade_logger.log_decision({'ticker': ticker, 'action': 'SKIP', 'price': price,
-                'sentiment_score': cand['bias'], 'weighted_score': score,
+            log(f"  ⏭️ {ticker}: Score {score:.3f} < threshold for {weakest['ticker']} ({ws:.3f})")
+            log_decision({'ticker': ticker, 'action': 'SKIP', 'price': price,
+                'sentiment_score': bias, 'weighted_score': score,
                 'decision_reason': f'SKIP: Below replacement threshold'})
 
+        self._flush_decisions(orders)
+        self._flush_log()
         return orders
 
 def main():
     try:
-        with open('sentiment_data.json', 'r') as f:
-            raw_data = json.load(f)
+        with open('sentiment_data.json', 'rb') as f:
+            raw_data = orjson.loads(f.read()) if orjson else json.load(f)
     except FileNotFoundError as e:
         print(f"Error loading sentiment_data.json: {e}")
         # Write sentinel record so every session has at least one DB entry
@@ -961,8 +1405,8 @@ def main():
     # current_portfolio.json is OPTIONAL — Alpaca API is the primary source
     # for live positions. This file is only a fallback for offline/mock mode.
     try:
-        with open('current_portfolio.json', 'r') as f:
-            portfolio = json.load(f)
+        with open('current_portfolio.json', 'rb') as f:
+            portfolio = orjson.loads(f.read()) if orjson else json.load(f)
     except FileNotFoundError:
         print("  ℹ️ current_portfolio.json not found — using Alpaca API for positions (normal).")
         portfolio = {"positions": {}}
@@ -978,13 +1422,37 @@ def main():
         macro_reason = 'Legacy format (no macro data)'
         sentiment_data = raw_data
 
+    # Prefilter + prioritize before handing off: actions the planner
+    # ignores never reach the hot loops, and the rank-descending order
+    # means slot fills consider the strongest sentiment first (see
+    # generate_plan's docstring). Ticker-less Buys pass through — the
+    # gather loop audits them as UNKNOWN SKIP rows and that trail must
+    # stay complete. Ticker-less Sells were never actionable or audited
+    # (the sell pass needs a held ticker), so those still drop here.
+    sentiment_data = [s for s in sentiment_data
+                      if (s.get('action') == 'Buy'
+                          or (s.get('action') == 'Sell' and s.get('ticker')))]
+    sentiment_data.sort(key=lambda s: s.get('sentiment_score') or 0, reverse=True)
+
     engine = TradingLogic()
 
     plan = engine.generate_plan(sentiment_data, portfolio, env_bias=env_bias, macro_reason=macro_reason)
 
+    # The plan is written in one shot rather than streamed: its length is
+    # bounded by the slot count (plus risk/trim sells), and _flush_decisions
+    # must back-patch decision ids across the whole list before any order
+    # is serialized. The stdlib fallback (json.dump) already writes
+    # incrementally to the file object.
     output_file = 'execution_plan.json'
-    with open(output_file, 'w') as f:
-        json.dump(plan, f, indent=4)
+    if orjson:
+        with open(output_file, 'wb') as f:
+            # PASSTHROUGH_DATACLASS routes Orders through to_dict (orjson
+            # would otherwise serialize all fields, including unset ones)
+            f.write(orjson.dumps(plan, default=Order.to_dict,
+                                 option=orjson.OPT_INDENT_2 | orjson.OPT_PASSTHROUGH_DATACLASS))
+    else:
+        with open(output_file, 'w') as f:
+            json.dump(plan, f, indent=4, default=Order.to_dict)
         
     print(f"\nExecution Plan Saved to {output_file} ({len(plan)} orders)")
 
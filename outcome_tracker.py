@@ -8,6 +8,8 @@ Usage:
     python outcome_tracker.py
 """
 import os
+import numpy as np
+import pandas as pd
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from alpaca.data.historical import StockHistoricalDataClient
@@ -54,7 +56,6 @@ def fetch_close_price(data_client, ticker, target_date):
             return None
         
         # Flatten multi-index if present
-        import pandas as pd
         if isinstance(bars.index, pd.MultiIndex):
             bars = bars.xs(ticker, level='symbol')
         
@@ -64,6 +65,44 @@ def fetch_close_price(data_client, ticker, target_date):
         return None
 
 
+def fetch_bars_bulk(data_client, tickers, start, end):
+    """
+    Fetches daily bars for ALL tickers over one spanning date range in a
+    single multi-symbol request. Returns {ticker: DataFrame}; an empty dict
+    on failure lets the caller fall back to per-ticker fetches.
+    """
+    try:
+        req = StockBarsRequest(
+            symbol_or_symbols=sorted(set(tickers)),
+            timeframe=TimeFrame.Day,
+            start=start,
+            end=end,
+            feed='iex'
+        )
+        bars = data_client.get_stock_bars(req).df
+        if bars.empty:
+            return {}
+        return {sym: grp.droplevel('symbol') for sym, grp in bars.groupby(level='symbol')}
+    except Exception as e:
+        print(f"  ⚠️ Bulk bar fetch failed ({e}) — falling back to per-ticker fetches.")
+        return {}
+
+
+def _close_on(ticker_bars, target_date):
+    """
+    First close on/after target_date within the 3-day weekend buffer —
+    same semantics as fetch_close_price, read from prefetched bars.
+    """
+    if ticker_bars is None or ticker_bars.empty:
+        return None
+    start_ts = pd.Timestamp(target_date.date(), tz=ticker_bars.index.tz)
+    window = ticker_bars[(ticker_bars.index >= start_ts)
+                         & (ticker_bars.index <= start_ts + pd.Timedelta(days=3))]
+    if window.empty:
+        return None
+    return float(window['close'].iloc[0])
+
+
 def track_outcomes():
     print("--- Outcome Tracker ---")
     
@@ -84,59 +123,96 @@ def track_outcomes():
     print(f"Found {len(pending)} decisions to track.\n")
     
     updated_count = 0
-    
-    for decision in pending:
+
+    # Pass 1: parse dates and collect decisions that are actually due, so
+    # pass 2 can fetch all their bars in one multi-symbol request instead
+    # of two HTTPS round-trips per decision. Dates parse in one C-level
+    # pd.to_datetime pass (NaT replaces the old per-row except branch).
+    raw_dates = pd.Series([d['filled_at'] or d['timestamp'] for d in pending])
+    filled_dates = pd.to_datetime(raw_dates, errors='coerce', utc=True,
+                                  format='mixed').dt.tz_localize(None)
+
+    due = []
+    for decision, filled_ts in zip(pending, filled_dates):
         dec_id = decision['id']
         ticker = decision['ticker']
-        filled_price = decision['filled_price']
-        filled_at_str = decision['filled_at'] or decision['timestamp']
-        
+
         print(f"📊 Tracking: {ticker} (Decision #{dec_id})")
-        
-        # Parse the filled_at date
-        try:
-            if 'T' in filled_at_str:
-                filled_date = datetime.fromisoformat(filled_at_str.replace('Z', '+00:00').split('+')[0])
-            else:
-                filled_date = datetime.strptime(filled_at_str[:19], '%Y-%m-%d %H:%M:%S')
-        except (ValueError, TypeError):
-            print(f"  ⚠️ Could not parse date: {filled_at_str}")
+
+        if pd.isna(filled_ts):
+            print(f"  ⚠️ Could not parse date: {decision['filled_at'] or decision['timestamp']}")
             continue
-        
+        filled_date = filled_ts.to_pydatetime()
+
         # Calculate target dates
         date_7d = filled_date + timedelta(days=7)
         date_14d = filled_date + timedelta(days=14)
-        
+
         # Only process if 14 days have passed
         if datetime.now() < date_14d:
             print(f"  ⏳ Only {(datetime.now() - filled_date).days} days passed. Need 14.")
             continue
-        
-        # Fetch prices
-        price_7d = fetch_close_price(api, ticker, date_7d)
-        price_14d = fetch_close_price(api, ticker, date_14d)
-        
+
+        due.append((decision, date_7d, date_14d))
+
+    if not due:
+        print(f"\n✅ Updated 0/{len(pending)} outcomes.")
+        return
+
+    # Pass 2: one spanning request covers every target date for every ticker
+    bars_by_ticker = fetch_bars_bulk(
+        api,
+        [d[0]['ticker'] for d in due],
+        start=min(d[1] for d in due),
+        end=max(d[2] for d in due) + timedelta(days=3)  # Buffer for weekends
+    )
+
+    # Resolve target-date prices for every due decision first…
+    resolved = []
+    for decision, date_7d, date_14d in due:
+        ticker = decision['ticker']
+        ticker_bars = bars_by_ticker.get(ticker)
+        if ticker_bars is not None:
+            price_7d = _close_on(ticker_bars, date_7d)
+            price_14d = _close_on(ticker_bars, date_14d)
+        else:
+            # Ticker missing from the bulk response — per-ticker fallback
+            price_7d = fetch_close_price(api, ticker, date_7d)
+            price_14d = fetch_close_price(api, ticker, date_14d)
+
         if price_14d is None:
             print(f"  ⚠️ Could not get 14-day price for {ticker}. Skipping.")
             continue
-        
-        # Calculate outcome
-        if filled_price and filled_price > 0:
-            outcome_pnl_pct = ((price_14d - filled_price) / filled_price) * 100
-        else:
-            outcome_pnl_pct = 0.0
-        
-        # Update DB
-        trade_logger.update_outcome(dec_id, price_7d, price_14d, outcome_pnl_pct)
-        
+
+        resolved.append((decision, price_7d, price_14d))
+
+    # …then compute every return in one vectorized pass instead of
+    # per-decision Python arithmetic (the guard mirrors the old
+    # `filled_price and filled_price > 0` branch).
+    if resolved:
+        filled = np.array([r[0]['filled_price'] or 0.0 for r in resolved], dtype=np.float64)
+        p14 = np.array([r[2] for r in resolved], dtype=np.float64)
+        pnl_pcts = np.where(filled > 0, (p14 - filled) / np.where(filled > 0, filled, 1.0) * 100.0, 0.0)
+    else:
+        pnl_pcts = np.empty(0)
+
+    outcome_rows = []
+    for (decision, price_7d, price_14d), outcome_pnl_pct in zip(resolved, pnl_pcts):
+        outcome_pnl_pct = float(outcome_pnl_pct)
+
+        outcome_rows.append((price_7d, price_14d, outcome_pnl_pct, decision['id']))
+
         # Display result
         direction = "📈" if outcome_pnl_pct > 0 else "📉"
         p7_display = f"${price_7d:.2f}" if price_7d else "N/A"
-        print(f"  {direction} Filled: ${filled_price:.2f} → 7d: {p7_display} → 14d: ${price_14d:.2f}")
+        print(f"  {direction} Filled: ${decision['filled_price']:.2f} → 7d: {p7_display} → 14d: ${price_14d:.2f}")
         print(f"     Return: {outcome_pnl_pct:+.2f}%")
-        
+
         updated_count += 1
-    
+
+    # One transaction for every outcome — a single fsync instead of N
+    trade_logger.update_outcomes_bulk(outcome_rows)
+
     print(f"\n✅ Updated {updated_count}/{len(pending)} outcomes.")
 
 
@@ -9,11 +9,29 @@ Usage:
 """
 import json
 import os
+import re
+
+try:
+    import orjson  # ~6x faster JSON codec; stdlib json is the fallback
+except ImportError:
+    orjson = None
+
+_json_loads = orjson.loads if orjson else json.loads
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from openai import OpenAI
 import config
 import trade_logger
 
+# Strips a leading/trailing markdown fence in one precompiled pass —
+# also handles the unbalanced-fence case the old replace() chain missed.
+_FENCE_RE = re.compile(r'^```(?:json)?\s*|\s*```\s*$')
+
+# Trades per grading call. Shards run concurrently, so wall time scales
+# with the slowest shard instead of the total prompt length, and a JSON
+# failure only discards one shard's grades instead of the whole review.
+CHUNK_SIZE = 20
+
 
 REVIEWER_PROMPT = """You are a Senior Quantitative Auditor reviewing a junior trader's decisions.
 
@@ -49,6 +67,73 @@ You will receive a table of completed trades with:
 """
 
 
+def _format_trade_table(decisions):
+    """Renders decisions as the markdown table the reviewer prompt expects.
+
+    Deliberately a plain comprehension rather than DataFrame.to_markdown:
+    that path needs the optional tabulate package and would still require
+    per-cell formatting to keep the $/% column style the prompt was tuned
+    on, so there is no vectorization win to buy — chunking already caps
+    each table at CHUNK_SIZE rows.
+    """
+    table_header = "| # | Ticker | Action | Decision Reason | Filled Price | 14d Price | Return % |"
+    table_sep =    "|---|--------|--------|-----------------|-------------|-----------|----------|"
+    table_rows = [
+        f"| {d['id']} | {d['ticker']} | {d['action']} | {d['decision_reason']} | ${d['filled_price']:.2f} | ${d['price_after_14d']:.2f} | {d['outcome_pnl_pct']:+.2f}% |"
+        for d in decisions
+    ]
+    return "\n".join([table_header, table_sep] + table_rows)
+
+
+def _grade_chunk(client, chunk):
+    """Grades one shard of trades. Returns the parsed result dict, or
+    None if the call or parse failed — only this shard's grades are lost."""
+    user_prompt = f"""Here are my recent completed trades and their actual 14-day outcomes:
+
+{_format_trade_table(chunk)}
+
+Please grade each trade and provide 3 specific improvements for my trading logic."""
+
+    try:
+        # Stream the completion: tokens accumulate as they generate, a
+        # progress dot prints every ~256 chars, and a network stall
+        # surfaces immediately instead of after full-generation latency.
+        response = client.chat.completions.create(
+            model=config.MODEL_NAME,
+            messages=[
+                {"role": "system", "content": REVIEWER_PROMPT},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=0.2,
+            # Schema-guided decoding: the server constrains output to a
+            # JSON object, so a stray prose preamble can't void the shard
+            response_format={"type": "json_object"},
+            stream=True
+        )
+
+        parts = []
+        streamed = 0
+        for event in response:
+            delta = event.choices[0].delta.content if event.choices else None
+            if not delta:
+                continue
+            parts.append(delta)
+            if streamed // 256 != (streamed + len(delta)) // 256:
+                print(".", end="", flush=True)
+            streamed += len(delta)
+        print()
+        content = "".join(parts)
+
+        return _json_loads(_FENCE_RE.sub('', content).strip())
+    except json.JSONDecodeError:
+        print(f"❌ Failed to parse AI response as JSON for a {len(chunk)}-trade chunk.")
+        print(f"Raw output:\n{content}")
+        return None
+    except Exception as e:
+        print(f"❌ API Error on a {len(chunk)}-trade chunk: {e}")
+        return None
+
+
 def review_strategy():
     print("--- AI Strategy Reviewer ---")
     
@@ -64,120 +149,90 @@ def review_strategy():
         return
     
     print(f"Found {len(decisions)} trades to review.\n")
-    
-    # 2. Format data for LLM
-    table_header = "| # | Ticker | Action | Decision Reason | Filled Price | 14d Price | Return % |"
-    table_sep =    "|---|--------|--------|-----------------|-------------|-----------|----------|"
-    table_rows = []
-    
-    for d in decisions:
-        row = f"| {d['id']} | {d['ticker']} | {d['action']} | {d['decision_reason']} | ${d['filled_price']:.2f} | ${d['price_after_14d']:.2f} | {d['outcome_pnl_pct']:+.2f}% |"
-        table_rows.append(row)
-    
-    trade_table = "\n".join([table_header, table_sep] + table_rows)
-    
-    user_prompt = f"""Here are my recent completed trades and their actual 14-day outcomes:
-
-{trade_table}
 
-Please grade each trade and provide 3 specific improvements for my trading logic."""
-
-    print("📤 Sending to DeepSeek for analysis...")
-    print(f"   Trades being reviewed: {len(decisions)}")
-    
-    # 3. Call DeepSeek
+    # 2/3. Shard trades into chunks and grade them concurrently
     if not config.DEEPSEEK_API_KEY:
         print("❌ DEEPSEEK_API_KEY not found.")
         return
-    
+
     client = OpenAI(
         api_key=config.DEEPSEEK_API_KEY,
         base_url=config.DEEPSEEK_BASE_URL
     )
-    
-    try:
-        response = client.chat.completions.create(
-            model=config.MODEL_NAME,
-            messages=[
-                {"role": "system", "content": REVIEWER_PROMPT},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.2,
-            stream=False
-        )
-        
-        content = response.choices[0].message.content
-        
-        # Clean up code blocks
-        if content.startswith("```json"):
-            content = content.replace("```json", "").replace("```", "")
-        elif content.startswith("```"):
-            content = content.replace("```", "")
-        
-        result = json.loads(content.strip())
-        
-    except json.JSONDecodeError:
-        print(f"❌ Failed to parse AI response as JSON.")
-        print(f"Raw output:\n{content}")
-        return
-    except Exception as e:
-        print(f"❌ API Error: {e}")
+
+    chunks = [decisions[i:i + CHUNK_SIZE]
+              for i in range(0, len(decisions), CHUNK_SIZE)]
+
+    print("📤 Sending to DeepSeek for analysis...")
+    print(f"   Trades being reviewed: {len(decisions)} ({len(chunks)} chunk(s))")
+
+    with ThreadPoolExecutor(max_workers=min(4, len(chunks))) as ex:
+        results = list(ex.map(lambda c: _grade_chunk(client, c), chunks))
+
+    grades = []
+    improvements_pool = []
+    assessments = []
+    for chunk_result in results:
+        if not chunk_result:
+            continue
+        grades.extend(chunk_result.get('grades', []))
+        improvements_pool.extend(chunk_result.get('improvements', []))
+        if chunk_result.get('overall_assessment'):
+            assessments.append(chunk_result['overall_assessment'])
+
+    if not grades:
+        print("❌ All grading chunks failed. No report generated.")
         return
-    
-    # 4. Save grades to DB
-    grades = result.get('grades', [])
+
+    result = {
+        'grades': grades,
+        'improvements': improvements_pool,
+        'overall_assessment': " ".join(assessments) or 'No assessment provided.',
+    }
+
+    # 4. Save grades to DB — one transaction for the whole batch
+    trade_logger.save_ai_reviews_bulk([
+        (g.get('grade', 'C'), g.get('feedback', ''), g.get('decision_id'))
+        for g in grades
+    ])
     for grade_entry in grades:
-        dec_id = grade_entry.get('decision_id')
-        grade = grade_entry.get('grade', 'C')
-        feedback = grade_entry.get('feedback', '')
-        
-        trade_logger.save_ai_review(dec_id, grade, feedback)
-        print(f"   Trade #{dec_id}: {grade} — {feedback}")
+        print(f"   Trade #{grade_entry.get('decision_id')}: "
+              f"{grade_entry.get('grade', 'C')} — {grade_entry.get('feedback', '')}")
     
-    # 5. Generate Strategy Report
+    # 5. Generate Strategy Report — streamed straight to the file, so
+    # memory stays flat however long the history gets and a partial
+    # report survives if the process dies mid-write.
     improvements = result.get('improvements', [])
     overall = result.get('overall_assessment', 'No assessment provided.')
-    
-    report_lines = [
-        f"# Strategy Review Report",
-        f"",
-        f"**Generated**: {datetime.now().strftime('%Y-%m-%d %H:%M')}",
-        f"**Trades Reviewed**: {len(decisions)}",
-        f"",
-        f"## Overall Assessment",
-        f"",
-        f"{overall}",
-        f"",
-        f"## Trade Grades",
-        f"",
-        f"| Decision # | Ticker | Action | Return | Grade | Feedback |",
-        f"|---|---|---|---|---|---|",
-    ]
-    
+
     # Match grades to decisions
     grade_map = {g['decision_id']: g for g in grades}
-    for d in decisions:
-        g = grade_map.get(d['id'], {})
-        grade = g.get('grade', '?')
-        feedback = g.get('feedback', '')
-        report_lines.append(
-            f"| {d['id']} | {d['ticker']} | {d['action']} | {d['outcome_pnl_pct']:+.2f}% | **{grade}** | {feedback} |"
-        )
-    
-    report_lines.extend([
-        f"",
-        f"## Recommended Improvements",
-        f"",
-    ])
-    
-    for imp in improvements:
-        report_lines.append(f"- {imp}")
-    
-    report_content = "\n".join(report_lines)
-    
+
     report_file = "strategy_report.md"
     with open(report_file, 'w', encoding='utf-8') as f:
-        f.write(report_content)
+        f.write(
+            f"# Strategy Review Report\n"
+            f"\n"
+            f"**Generated**: {datetime.now().strftime('%Y-%m-%d %H:%M')}\n"
+            f"**Trades Reviewed**: {len(decisions)}\n"
+            f"\n"
+            f"## Overall Assessment\n"
+            f"\n"
+            f"{overall}\n"
+            f"\n"
+            f"## Trade Grades\n"
+            f"\n"
+            f"| Decision # | Ticker | Action | Return | Grade | Feedback |\n"
+            f"|---|---|---|---|---|---|\n"
+        )
+        f.writelines(
+            f"| {d['id']} | {d['ticker']} | {d['action']} | {d['outcome_pnl_pct']:+.2f}% "
+            f"| **{grade_map.get(d['id'], {}).get('grade', '?')}** "
+            f"| {grade_map.get(d['id'], {}).get('feedback', '')} |\n"
+            for d in decisions
+        )
+        f.write("\n## Recommended Improvements\n\n")
+        f.writelines(f"- {imp}\n" for imp in improvements)
     
     print(f"\n✅ Strategy report saved to {report_file}")
     print(f"\n--- Improvements ---")
@@ -18,7 +18,9 @@ import time
 import json
 import logging
 import argparse
+import threading
 from datetime import datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
 
 import pytz
@@ -57,25 +59,45 @@ HEARTBEAT_FILE = Path(__file__).parent / "logs" / ".heartbeat"
 
 
 def write_heartbeat():
-    """Touch the heartbeat file so Docker healthcheck can verify liveness."""
+    """Touch the heartbeat file so Docker healthcheck can verify liveness.
+
+    The healthcheck only needs mtime, so os.utime is a single syscall
+    versus the old open/write/close plus chmod every minute.
+    """
     try:
-        HEARTBEAT_FILE.write_text(datetime.now(TZ_UTC).isoformat())
-        os.chmod(HEARTBEAT_FILE, 0o666)  # Ensure readable by Docker engine
+        os.utime(HEARTBEAT_FILE)
+    except FileNotFoundError:
+        try:
+            HEARTBEAT_FILE.touch()
+            os.chmod(HEARTBEAT_FILE, 0o666)  # Ensure readable by Docker engine
+        except Exception as e:
+            log.warning(f"Heartbeat create failed: {e}")
     except Exception as e:
         log.warning(f"Heartbeat write failed: {e}")
 
 
+_HEARTBEAT_STOP = threading.Event()
+
+
+def start_heartbeat_thread():
+    """
+    Touch the heartbeat from a daemon thread every 60s so liveness is
+    decoupled from scheduling — the main thread can sleep whole intervals
+    instead of waking once a minute just to prove it is alive.
+    """
+    def _beat():
+        write_heartbeat()
+        while not _HEARTBEAT_STOP.wait(60):
+            write_heartbeat()
+
+    threading.Thread(target=_beat, name="heartbeat", daemon=True).start()
+
+
 def check_heartbeat(max_age_seconds: int = 300) -> bool:
     """Return True if heartbeat was updated within max_age_seconds."""
     try:
-        if not HEARTBEAT_FILE.exists():
-            return False
-        last = datetime.fromisoformat(HEARTBEAT_FILE.read_text().strip())
-        if last.tzinfo is None:
-            last = TZ_UTC.localize(last)
-        age = (datetime.now(TZ_UTC) - last).total_seconds()
-        return age < max_age_seconds
-    except Exception:
+        return time.time() - HEARTBEAT_FILE.stat().st_mtime < max_age_seconds
+    except OSError:
         return False
 
 
@@ -85,15 +107,15 @@ def check_heartbeat(max_age_seconds: int = 300) -> bool:
 NYSE = mcal.get_calendar("NYSE")
 
 
-def get_today_schedule():
+@lru_cache(maxsize=512)
+def _schedule_for(date_str):
     """
-    Return (market_open, market_close) as tz-aware datetime in ET,
-    or (None, None) if today is not a trading day.
+    Return (market_open, market_close) in ET for a YYYY-MM-DD date, or
+    (None, None) on non-trading days. A day's schedule never changes, so
+    results cache indefinitely — the main loop and next_trading_day stop
+    rebuilding the same one-row pandas DataFrame every iteration.
     """
-    now_et = datetime.now(TZ_NY)
-    today_str = now_et.strftime("%Y-%m-%d")
-    schedule = NYSE.schedule(start_date=today_str, end_date=today_str)
-
+    schedule = NYSE.schedule(start_date=date_str, end_date=date_str)
     if schedule.empty:
         return None, None
 
@@ -101,10 +123,15 @@ def get_today_schedule():
     market_close_utc = schedule.iloc[0]["market_close"].to_pydatetime()
 
     # Convert to ET for human-readable logging
-    market_open_et = market_open_utc.astimezone(TZ_NY)
-    market_close_et = market_close_utc.astimezone(TZ_NY)
+    return market_open_utc.astimezone(TZ_NY), market_close_utc.astimezone(TZ_NY)
 
-    return market_open_et, market_close_et
+
+def get_today_schedule():
+    """
+    Return (market_open, market_close) as tz-aware datetime in ET,
+    or (None, None) if today is not a trading day.
+    """
+    return _schedule_for(datetime.now(TZ_NY).strftime("%Y-%m-%d"))
 
 
 def next_trading_day():
@@ -114,8 +141,7 @@ def next_trading_day():
     # Look up to 7 days ahead to skip weekends + holidays
     for _ in range(7):
         check = future.strftime("%Y-%m-%d")
-        sched = NYSE.schedule(start_date=check, end_date=check)
-        if not sched.empty:
+        if _schedule_for(check)[0] is not None:
             return check
         future += timedelta(days=1)
     return (now_et + timedelta(days=1)).strftime("%Y-%m-%d")
@@ -146,6 +172,14 @@ def run_pipeline(session_name: str):
         import trader
         trader.execute_trades()
 
+        # Positions just changed — drop telegram_bot's cached snapshot so
+        # the post-session summary reflects the fills
+        try:
+            import telegram_bot
+            telegram_bot.invalidate_portfolio_cache()
+        except Exception:
+            pass
+
         log.info(f"PIPELINE COMPLETE — {session_name}")
         return True
 
@@ -158,7 +192,7 @@ def post_session_telegram(session_name: str, success: bool):
     """Send Telegram summary after a session run."""
     try:
         import telegram_bot
-        telegram_bot.send_summary(session_name, success)
+        telegram_bot.enqueue_summary(session_name, success)
     except Exception as e:
         log.warning(f"Telegram summary failed: {e}")
 
@@ -167,8 +201,8 @@ def friday_backup():
     """Trigger DB backup on Fridays after market close."""
     try:
         import telegram_bot
-        telegram_bot.send_backup()
-        log.info("Friday DB backup sent via Telegram.")
+        telegram_bot.enqueue_backup()
+        log.info("Friday DB backup queued for Telegram.")
     except Exception as e:
         log.warning(f"Friday backup failed: {e}")
 
@@ -177,8 +211,8 @@ def monday_heartbeat():
     """Send Monday morning heartbeat via Telegram."""
     try:
         import telegram_bot
-        telegram_bot.send_heartbeat()
-        log.info("Monday heartbeat sent.")
+        telegram_bot.enqueue_heartbeat()
+        log.info("Monday heartbeat queued.")
     except Exception as e:
         log.warning(f"Monday heartbeat failed: {e}")
 
@@ -188,19 +222,18 @@ def monday_heartbeat():
 # ---------------------------------------------------------------------------
 def sleep_until(target: datetime, label: str = ""):
     """
-    Sleep until the target datetime, writing heartbeat every 60s.
-    Handles DST transitions via pytz-aware datetimes.
+    Sleep until the target datetime. Heartbeats come from the background
+    thread, so the main thread sleeps whole intervals — capped at an hour
+    per stretch so clock jumps and DST transitions self-correct against
+    the pytz-aware target on the next wake.
     """
     while True:
         now = datetime.now(TZ_NY)
         delta = (target - now).total_seconds()
         if delta <= 0:
             break
-        # Log every 15 minutes
-        if int(delta) % 900 == 0:
-            log.info(f"Sleeping {delta/60:.0f}min until {label} ({target.strftime('%H:%M ET')})")
-        write_heartbeat()
-        time.sleep(min(delta, 60))  # Wake every 60s for heartbeat
+        log.info(f"Sleeping {delta/60:.0f}min until {label} ({target.strftime('%H:%M ET')})")
+        time.sleep(min(delta, 3600))
 
 
 # ---------------------------------------------------------------------------
@@ -216,7 +249,10 @@ def check_db_integrity():
             return True
         conn = sqlite3.connect(db_path)
         c = conn.cursor()
-        c.execute("PRAGMA integrity_check;")
+        # quick_check skips the full page scan of integrity_check — it
+        # still catches malformed headers and index corruption, without
+        # making first boot O(database size) as the history grows.
+        c.execute("PRAGMA quick_check;")
         result = c.fetchone()[0]
         conn.close()
         if result == "ok":
@@ -301,10 +337,27 @@ def _run_loop(dry_run: bool):
         sleep_until(next_open, f"next open ({next_day})")
 
 
+def prewarm_pipeline():
+    """
+    Import the pipeline modules (and their pandas/numpy/alpaca trees)
+    during startup so the cost lands in the idle countdown, not in the
+    session window — run_pipeline's imports become sys.modules no-ops.
+    """
+    started = time.monotonic()
+    try:
+        import market_brain, logic_engine, trader  # noqa: F401
+        get_today_schedule()  # also warms the NYSE calendar rules
+        log.info(f"Pipeline modules prewarmed in {time.monotonic() - started:.1f}s")
+    except Exception as e:
+        log.warning(f"Pipeline prewarm failed (will import at session time): {e}")
+
+
 def main(dry_run: bool = False):
     log.info("=" * 60)
     log.info("stockexchange_V0.5 Supervisor — Starting")
     check_db_integrity()
+    start_heartbeat_thread()
+    prewarm_pipeline()
     log.info(f"  Timezone: {TZ_NY} | DST active: {bool(datetime.now(TZ_NY).dst())}")
     log.info("=" * 60)
 
@@ -315,12 +368,8 @@ def main(dry_run: bool = False):
             now_et = datetime.now(TZ_NY)
             # Determine actual next session based on current time
             try:
-                today_str = now_et.strftime("%Y-%m-%d")
-                cal = mcal.get_calendar('NYSE')
-                sched = cal.schedule(start_date=today_str, end_date=today_str)
-                if len(sched) > 0:
-                    m_open = sched.iloc[0]['market_open'].astimezone(TZ_NY)
-                    m_close = sched.iloc[0]['market_close'].astimezone(TZ_NY)
+                m_open, m_close = get_today_schedule()
+                if m_open is not None:
                     mg = m_open + timedelta(minutes=15)
                     cs = m_close - timedelta(minutes=30)
                     if now_et < mg:
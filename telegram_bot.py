@@ -8,17 +8,32 @@ Functions:
   send_alert()     — General-purpose alert (errors, defense mode)
 """
 
+import atexit
+import gzip
 import os
 import json
+import queue
+import shutil
 import sqlite3
 import logging
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
 
 import pytz
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter, Retry
 from dotenv import load_dotenv
 
+try:
+    import orjson  # ~6x faster JSON codec; stdlib json is the fallback
+except ImportError:
+    orjson = None
+
+_json_loads = orjson.loads if orjson else json.loads
+
 load_dotenv()
 
 log = logging.getLogger("telegram_bot")
@@ -37,6 +52,32 @@ PLAN_FILE = Path(__file__).parent / "execution_plan.json"
 TZ_NY = pytz.timezone("America/New_York")
 TZ_LONDON = pytz.timezone("Europe/London")
 
+# One pooled session for all Telegram calls: keep-alive connections skip
+# the per-request TLS handshake, and connection failures retry with
+# backoff (POSTs are not replayed on timeouts — Retry's defaults exclude
+# them, which avoids duplicate messages).
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(
+    pool_connections=4, pool_maxsize=4,
+    max_retries=Retry(total=3, backoff_factor=0.3),
+))
+
+_ALPACA_CLIENT = None
+
+
+def _alpaca_client():
+    """Lazily builds one shared Alpaca TradingClient — constructing it
+    per summary call paid a fresh session and auth setup every time."""
+    global _ALPACA_CLIENT
+    if _ALPACA_CLIENT is None:
+        from alpaca.trading.client import TradingClient
+        _ALPACA_CLIENT = TradingClient(
+            os.getenv("ALPACA_API_KEY", ""),
+            os.getenv("ALPACA_SECRET_KEY", ""),
+            paper=True,
+        )
+    return _ALPACA_CLIENT
+
 
 def _is_configured() -> bool:
     if not BOT_TOKEN or not CHAT_ID:
@@ -56,7 +97,7 @@ def _send_message(text: str, parse_mode: str = "Markdown"):
         payload = {"chat_id": CHAT_ID, "text": text}
         if parse_mode:
             payload["parse_mode"] = parse_mode
-        resp = requests.post(
+        resp = _session.post(
             f"{BASE_URL}/sendMessage",
             json=payload,
             timeout=15,
@@ -75,7 +116,7 @@ def _send_document(file_path: Path, caption: str = ""):
         return None
     try:
         with open(file_path, "rb") as f:
-            resp = requests.post(
+            resp = _session.post(
                 f"{BASE_URL}/sendDocument",
                 data={"chat_id": CHAT_ID, "caption": caption},
                 files={"document": (file_path.name, f)},
@@ -89,16 +130,88 @@ def _send_document(file_path: Path, caption: str = ""):
         return None
 
 
+# ---------------------------------------------------------------------------
+# Background outbox — keeps Telegram latency off the supervisor's
+# critical path. Callers enqueue; one daemon thread drains.
+# ---------------------------------------------------------------------------
+_OUTBOX = queue.Queue(maxsize=64)
+_outbox_lock = threading.Lock()
+_outbox_thread = None
+
+
+def _outbox_worker():
+    while True:
+        fn, args, kwargs = _OUTBOX.get()
+        try:
+            fn(*args, **kwargs)
+        except Exception as e:
+            log.warning(f"Outbox send failed: {e}")
+        finally:
+            _OUTBOX.task_done()
+
+
+def _flush_outbox(timeout: float = 30):
+    """Give queued sends a bounded window to drain before interpreter exit.
+
+    Polls unfinished_tasks, not empty(): the queue reads empty the moment
+    the worker get()s the last item, before its HTTP send has run, and
+    returning then would let the interpreter kill the daemon thread
+    mid-send. unfinished_tasks only drops in task_done(), after the send.
+    """
+    deadline = time.monotonic() + timeout
+    while _OUTBOX.unfinished_tasks > 0 and time.monotonic() < deadline:
+        time.sleep(0.2)
+
+
+def _enqueue(fn, *args, **kwargs):
+    global _outbox_thread
+    with _outbox_lock:
+        if _outbox_thread is None:
+            _outbox_thread = threading.Thread(
+                target=_outbox_worker, name="telegram-outbox", daemon=True)
+            _outbox_thread.start()
+            atexit.register(_flush_outbox)
+    try:
+        _OUTBOX.put_nowait((fn, args, kwargs))
+    except queue.Full:
+        log.warning("Telegram outbox full — dropping message.")
+
+
+def enqueue_summary(session_name: str = "Session", success: bool = True):
+    """Queue send_summary on the outbox and return immediately."""
+    _enqueue(send_summary, session_name, success)
+
+
+def enqueue_backup():
+    """Queue send_backup on the outbox and return immediately."""
+    _enqueue(send_backup)
+
+
+def enqueue_heartbeat():
+    """Queue send_heartbeat on the outbox and return immediately."""
+    _enqueue(send_heartbeat)
+
+
 # ---------------------------------------------------------------------------
 # Portfolio helpers
 # ---------------------------------------------------------------------------
+# Portfolio snapshot cache: send_heartbeat and send_summary can run
+# minutes (or seconds) apart, and each fetch is two Alpaca round-trips.
+_PF_CACHE = {"at": 0.0, "value": None}
+_PF_TTL = 60  # seconds
+
+
+def invalidate_portfolio_cache():
+    """Drop the cached snapshot — supervisor calls this after trades fill."""
+    _PF_CACHE["value"] = None
+
+
 def _get_portfolio_summary() -> dict:
-    """Query Alpaca for current positions and P/L."""
+    """Query Alpaca for current positions and P/L (cached for 60s)."""
+    if _PF_CACHE["value"] is not None and time.monotonic() - _PF_CACHE["at"] < _PF_TTL:
+        return _PF_CACHE["value"]
     try:
-        from alpaca.trading.client import TradingClient
-        api_key = os.getenv("ALPACA_API_KEY", "")
-        secret_key = os.getenv("ALPACA_SECRET_KEY", "")
-        client = TradingClient(api_key, secret_key, paper=True)
+        client = _alpaca_client()
         account = client.get_account()
         positions = client.get_all_positions()
 
@@ -116,14 +229,18 @@ def _get_portfolio_summary() -> dict:
 
         holdings.sort(key=lambda x: x["pnl_pct"], reverse=True)
 
-        return {
+        summary = {
             "equity": float(account.equity),
             "cash": float(account.cash),
             "buying_power": float(account.buying_power),
             "total_pnl": sum(h["pnl_pct"] for h in holdings),
             "holdings": holdings,
         }
+        _PF_CACHE["value"] = summary
+        _PF_CACHE["at"] = time.monotonic()
+        return summary
     except Exception as e:
+        # Failures are never cached — the next caller retries the fetch
         log.warning(f"Portfolio fetch failed: {e}")
         return {"equity": 0, "cash": 0, "buying_power": 0, "total_pnl": 0, "holdings": []}
 
@@ -131,8 +248,8 @@ def _get_portfolio_summary() -> dict:
 def _get_macro_data() -> dict:
     """Read latest sentiment_data.json for macro context."""
     try:
-        with open(SENTIMENT_FILE, "r") as f:
-            data = json.load(f)
+        with open(SENTIMENT_FILE, "rb") as f:
+            data = _json_loads(f.read())
         if isinstance(data, dict) and "global_env_bias" in data:
             return {
                 "env_bias": data.get("global_env_bias", 1.0),
@@ -187,9 +304,16 @@ def send_summary(session_name: str = "Session", success: bool = True):
     now_ny = datetime.now(TZ_NY).strftime("%Y-%m-%d %H:%M ET")
     now_ldn = datetime.now(TZ_LONDON).strftime("%H:%M GMT")
 
-    macro = _get_macro_data()
-    portfolio = _get_portfolio_summary()
-    execution = _get_execution_summary()
+    # The three sources are independent I/O (Alpaca REST, a JSON file,
+    # SQLite) — fetch them concurrently so latency is the slowest fetch,
+    # not the sum of all three.
+    with ThreadPoolExecutor(max_workers=3) as ex:
+        macro_f = ex.submit(_get_macro_data)
+        portfolio_f = ex.submit(_get_portfolio_summary)
+        execution_f = ex.submit(_get_execution_summary)
+        macro = macro_f.result()
+        portfolio = portfolio_f.result()
+        execution = execution_f.result()
 
     # Env bias emoji
     bias = macro["env_bias"]
@@ -217,20 +341,21 @@ def send_summary(session_name: str = "Session", success: bool = True):
     ]
 
     # Top Gainers / Losers
+    # holdings is already sorted by pnl_pct desc, so the top gainers are
+    # the leading positives and the worst losers the trailing negatives —
+    # no need to re-filter the whole list twice.
     holdings = portfolio["holdings"]
     if holdings:
-        gainers = [h for h in holdings if h["pnl_pct"] > 0]
-        losers = [h for h in holdings if h["pnl_pct"] < 0]
+        top = [h for h in holdings[:3] if h["pnl_pct"] > 0]
+        bottom = [h for h in holdings[-3:] if h["pnl_pct"] < 0]
 
-        if gainers:
-            top = gainers[:3]
+        if top:
             lines.append("")
             lines.append("*📈 Top Gainers*")
             for h in top:
                 lines.append(f"  `{h['ticker']}` +{h['pnl_pct']:.1f}% (${h['current']:.2f})")
 
-        if losers:
-            bottom = losers[-3:]
+        if bottom:
             lines.append("")
             lines.append("*📉 Top Losers*")
             for h in bottom:
@@ -310,7 +435,32 @@ def send_backup():
 
     now_ny = datetime.now(TZ_NY).strftime("%Y-%m-%d %H:%M ET")
     caption = f"📦 Weekly DB Backup — {now_ny}"
-    _send_document(DB_FILE, caption=caption)
+
+    # Snapshot through SQLite's online backup API first: copying the raw
+    # file while WAL writers are active can capture a torn page set,
+    # whereas backup() yields a consistent image without blocking them.
+    # The snapshot then compresses 3-5x (sparse pages, repeated schema),
+    # keeping the weekly upload under Telegram's 50 MB cap as history
+    # grows. Decompress with plain gunzip to restore.
+    snap_file = DB_FILE.with_suffix(".db.snapshot")
+    gz_file = DB_FILE.with_suffix(".db.gz")
+    try:
+        src_conn = sqlite3.connect(DB_FILE)
+        dst_conn = sqlite3.connect(snap_file)
+        try:
+            src_conn.backup(dst_conn, pages=1024)
+        finally:
+            src_conn.close()
+            dst_conn.close()
+        with open(snap_file, "rb") as src, gzip.open(gz_file, "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, 1 << 20)
+        _send_document(gz_file, caption=caption)
+    except (OSError, sqlite3.Error) as e:
+        log.warning(f"DB snapshot/compression failed ({e}) — sending raw file.")
+        _send_document(DB_FILE, caption=caption)
+    finally:
+        snap_file.unlink(missing_ok=True)
+        gz_file.unlink(missing_ok=True)
     log.info("DB backup sent via Telegram.")
 
 
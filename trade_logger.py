@@ -1,8 +1,11 @@
+import atexit
 import glob
 import os
-import shutil
 import sqlite3
 import datetime
+import threading
+import time
+from functools import lru_cache
 import config
 
 DB_DIR = 'data'
@@ -10,6 +13,114 @@ if not os.path.exists(DB_DIR):
     os.makedirs(DB_DIR)
 DB_FILE = os.path.join(DB_DIR, 'trade_history.db')
 
+
+def _connect(**kwargs):
+    """Opens a connection with the write-path pragmas applied.
+
+    journal_mode=WAL is set once by init_db and persists in the DB file;
+    synchronous=NORMAL is per-connection, so every writer goes through
+    here. NORMAL under WAL skips the fsync on each commit while still
+    guaranteeing durability of the WAL checkpoint — the right trade for
+    an append-mostly decision log.
+    """
+    # isolation_level=None puts the connection in true autocommit:
+    # sqlite3 stops sneaking implicit BEGINs in front of DML, and the
+    # write helpers open their transactions explicitly with _begin()
+    conn = sqlite3.connect(DB_FILE, cached_statements=256,
+                           isolation_level=None, **kwargs)
+    conn.execute('PRAGMA synchronous=NORMAL')
+    # Checkpoint in ~5000-page batches (default 1000) — fewer, larger
+    # WAL folds during a busy session; backup_db truncates it at the end
+    conn.execute('PRAGMA wal_autocheckpoint=5000')
+    # Read-path pragmas (all per-connection): spill sorts/temp B-trees to
+    # RAM, mmap the DB file (cap, not an allocation), and give the page
+    # cache room to hold the whole history table.
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.execute('PRAGMA mmap_size=268435456')
+    conn.execute('PRAGMA cache_size=-65536')
+    return conn
+
+
+# One connection for the life of the process. Reopening per call re-reads
+# the schema, reapplies pragmas and starts with a cold page cache, and the
+# trader loop hits these helpers dozens of times per session. WAL keeps
+# cross-process readers (dashboard, view_logs) happy alongside it.
+_CONN = None
+_CONN_LOCK = threading.Lock()   # guards lazy open
+_WRITE_LOCK = threading.Lock()  # serializes execute+commit pairs across threads
+
+
+def _get_conn():
+    """Returns the shared connection, opening it on first use.
+
+    check_same_thread=False because writes can come from worker threads;
+    every mutating helper holds _WRITE_LOCK around its execute+commit so
+    transactions never interleave.
+    """
+    global _CONN
+    if _CONN is None:
+        with _CONN_LOCK:
+            if _CONN is None:
+                _CONN = _connect(check_same_thread=False)
+    return _CONN
+
+
+@atexit.register
+def _close_conn():
+    if _CONN is not None:
+        _CONN.close()
+
+
+# When a trader session transaction is open, the write helpers skip their
+# per-batch commits and everything lands with one fsync at end_session().
+_IN_SESSION = False
+
+
+def _begin(conn):
+    # IMMEDIATE grabs the write lock up front instead of at first write;
+    # inside a session transaction the statement is already open
+    if not _IN_SESSION:
+        conn.execute('BEGIN IMMEDIATE')
+
+
+def _maybe_commit(conn):
+    if not _IN_SESSION:
+        conn.commit()
+
+
+def begin_session():
+    """Opens one explicit transaction covering a whole trader session.
+
+    BEGIN IMMEDIATE takes the database write lock up front, so the
+    session can't stall mid-plan waiting on another writer.
+    """
+    global _IN_SESSION
+    conn = _get_conn()
+    with _WRITE_LOCK:
+        conn.execute('BEGIN IMMEDIATE')
+        _IN_SESSION = True
+
+
+def _clear_read_caches():
+    """Drops the memoized read results after any decision write.
+
+    get_latest_scores caches per ticker; the blacklist cache holds the
+    DB verdict (negative exit in the cooldown window) per ticker. A new
+    row can change either, so writers clear both.
+    """
+    get_latest_scores.cache_clear()
+    _BLACKLIST_CACHE.clear()
+
+
+def end_session():
+    """Commits the session transaction opened by begin_session()."""
+    global _IN_SESSION
+    conn = _get_conn()
+    with _WRITE_LOCK:
+        if _IN_SESSION:
+            conn.commit()
+            _IN_SESSION = False
+
 # --- All new columns to migrate safely ---
 _MIGRATIONS = [
     'duration_score REAL',
@@ -34,11 +145,54 @@ _MIGRATIONS = [
     'weighted_score REAL',
     'swap_state TEXT',         # NULL | scout | pending_complete | scout_failed
     'scout_entry_score REAL',  # score at time of scout entry
+    # v5: integer epoch seconds alongside the ISO timestamp — range
+    # compares become branch-free integer probes with no parsing
+    'ts_epoch INTEGER',
 ]
 
+# Bump whenever _MIGRATIONS grows — init_db only replays the migration
+# list when the file's PRAGMA user_version is behind.
+_SCHEMA_VERSION = 6
+
+# Hot UPDATE statements as module constants: handing execute the same str
+# object every call keeps them warm in the connection's statement cache.
+_UPDATE_EXEC_SQL = '''
+    UPDATE history SET
+        order_id = ?,
+        execution_status = ?,
+        filled_price = ?,
+        filled_qty = ?,
+        filled_at = ?
+    WHERE id = ?
+'''
+
+_UPDATE_OUTCOME_SQL = '''
+    UPDATE history SET
+        price_after_7d = ?,
+        price_after_14d = ?,
+        outcome_pnl_pct = ?
+    WHERE id = ?
+'''
+
+_SAVE_REVIEW_SQL = '''
+    UPDATE history SET
+        decision_grade = ?,
+        ai_feedback = ?
+    WHERE id = ?
+'''
+
 def init_db():
-    conn = sqlite3.connect(DB_FILE)
+    conn = _get_conn()
     c = conn.cursor()
+
+    # WAL survives in the database file once set: readers (dashboard,
+    # view_logs) no longer block writers, and commits avoid the rollback
+    # journal's double write.
+    c.execute('PRAGMA journal_mode=WAL')
+
+    # Autocommit connection: group the DDL below into one transaction
+    # (the WAL pragma itself has to run outside one)
+    c.execute('BEGIN')
     
     c.execute('''
         CREATE TABLE IF NOT EXISTS history (
@@ -72,19 +226,52 @@ def init_db():
             sma_50 REAL,
             high_water_mark REAL,
             env_bias REAL,
-            macro_reason TEXT
+            macro_reason TEXT,
+            ts_epoch INTEGER
         )
     ''')
     
-    # Safe migration: add columns if old schema lacks them
-    for col_def in _MIGRATIONS:
-        try:
-            c.execute(f'ALTER TABLE history ADD COLUMN {col_def}')
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-    
+    # Safe migration: add columns if old schema lacks them. Gated on the
+    # stored schema version so steady-state startups skip the whole list,
+    # and diffed against PRAGMA table_info so only genuinely missing
+    # columns pay the ALTER (each attempted add grabs the write lock and
+    # bumps the schema cookie — no more try/except per column).
+    (user_version,) = c.execute('PRAGMA user_version').fetchone()
+    if user_version < _SCHEMA_VERSION:
+        existing = {row[1] for row in c.execute('PRAGMA table_info(history)')}
+        for col_def in _MIGRATIONS:
+            if col_def.split()[0] not in existing:
+                c.execute(f'ALTER TABLE history ADD COLUMN {col_def}')
+        # v6: normalize any space-separated legacy timestamps to ISO 'T'
+        # form once, so readers only ever need fromisoformat (strptime is
+        # an order of magnitude slower and the dual-format branch is gone)
+        c.execute("UPDATE history SET timestamp = REPLACE(timestamp, ' ', 'T') "
+                  "WHERE timestamp NOT LIKE '%T%'")
+        c.execute(f'PRAGMA user_version = {_SCHEMA_VERSION}')
+
+    # Hot-query indexes: per-ticker history ordered by recency
+    # (get_last_buy_time, get_latest_scores, the blacklist window), and
+    # two partial indexes matching the outcome-tracker / reviewer backlog
+    # predicates exactly — those stay tiny because graded rows fall out
+    # of them. No index on id: it aliases the rowid, so the dashboard's
+    # ORDER BY id DESC tail reads are already a reverse table scan and an
+    # index there is pure per-insert overhead.
+    c.execute('DROP INDEX IF EXISTS ix_hist_id_desc')
+    c.execute('DROP INDEX IF EXISTS ix_hist_ta')  # subsumed by ix_hist_ta_ts
+    c.execute('''CREATE INDEX IF NOT EXISTS ix_hist_ta_ts
+                 ON history(ticker, action, timestamp DESC)''')
+    c.execute('CREATE INDEX IF NOT EXISTS ix_hist_ts_epoch ON history(ts_epoch)')
+    c.execute('''CREATE INDEX IF NOT EXISTS ix_hist_pending_outcomes
+                 ON history(timestamp)
+                 WHERE action = 'BUY' AND execution_status = 'filled'
+                   AND price_after_14d IS NULL''')
+    c.execute('''CREATE INDEX IF NOT EXISTS ix_hist_ungraded
+                 ON history(timestamp)
+                 WHERE action = 'BUY' AND execution_status = 'filled'
+                   AND price_after_14d IS NOT NULL
+                   AND (decision_grade IS NULL OR decision_grade = '')''')
+
     conn.commit()
-    conn.close()
 
 
 def backup_db(keep_last=7):
@@ -102,7 +289,28 @@ def backup_db(keep_last=7):
 
     timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
     backup_path = os.path.join(backup_dir, f'trade_history_{timestamp}.db')
-    shutil.copy2(DB_FILE, backup_path)
+    # Online backup API: a page-by-page copy under a read lock, so a
+    # concurrent writer can't tear the copy the way a raw file copy
+    # could under WAL (copy2 grabs the main file without its WAL —
+    # un-checkpointed rows silently vanish from the backup).
+    # Checkpointing first folds the WAL in so the backup is one
+    # self-contained .db.
+    try:
+        src_conn = _get_conn()
+        with _WRITE_LOCK:
+            src_conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            # End-of-session analyze: refreshes the query planner's stats
+            # for whichever indexes this session actually used. Near-free
+            # here, and stale stats can cost whole index scans later.
+            src_conn.execute('PRAGMA optimize')
+        dst_conn = sqlite3.connect(backup_path)
+        try:
+            src_conn.backup(dst_conn, pages=1000)
+        finally:
+            dst_conn.close()
+    except sqlite3.Error as e:
+        print(f"⚠️  DB backup failed: {e}")
+        return
     print(f"💾  DB backed up → {backup_path}")
 
     # Prune old backups, keep only the most recent `keep_last`
@@ -116,107 +324,209 @@ def backup_db(keep_last=7):
 def log_decision(decision_data):
     """Logs a decision from logic_engine.py. Returns the row ID (-1 on failure)."""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        
-        c.execute('''
-            INSERT INTO history (
-                timestamp, ticker, action, quantity, price, 
-                sentiment_score, duration_score, sentiment_reason, rsi_14, sma_20, decision_reason,
-                entry_price, exit_price, pnl, pnl_percent,
-                atr_14, sma_50, high_water_mark,
-                env_bias, macro_reason,
-                weighted_score
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            datetime.datetime.now().isoformat(),
-            decision_data.get('ticker'),
-            decision_data.get('action'),
-            decision_data.get('quantity', 0),
-            decision_data.get('price'),
-            decision_data.get('sentiment_score'),
-            decision_data.get('duration_score', 0.0),
-            decision_data.get('sentiment_reason', ''),
-            decision_data.get('rsi_14'),
-            decision_data.get('sma_20'),
-            decision_data.get('decision_reason', ''),
-            decision_data.get('entry_price'),
-            decision_data.get('exit_price'),
-            decision_data.get('pnl'),
-            decision_data.get('pnl_percent'),
-            decision_data.get('atr_14'),
-            decision_data.get('sma_50'),
-            decision_data.get('high_water_mark'),
-            decision_data.get('env_bias'),
-            decision_data.get('macro_reason'),
-            decision_data.get('weighted_score')
-        ))
-        
-        row_id = c.lastrowid
-        conn.commit()
-        conn.close()
+        conn = _get_conn()
+        with _WRITE_LOCK:
+            _begin(conn)
+            c = conn.execute('''
+                INSERT INTO history (
+                    timestamp, ticker, action, quantity, price,
+                    sentiment_score, duration_score, sentiment_reason, rsi_14, sma_20, decision_reason,
+                    entry_price, exit_price, pnl, pnl_percent,
+                    atr_14, sma_50, high_water_mark,
+                    env_bias, macro_reason,
+                    weighted_score, ts_epoch
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                datetime.datetime.now().isoformat(),
+                decision_data.get('ticker'),
+                decision_data.get('action'),
+                decision_data.get('quantity', 0),
+                decision_data.get('price'),
+                decision_data.get('sentiment_score'),
+                decision_data.get('duration_score', 0.0),
+                decision_data.get('sentiment_reason', ''),
+                decision_data.get('rsi_14'),
+                decision_data.get('sma_20'),
+                decision_data.get('decision_reason', ''),
+                decision_data.get('entry_price'),
+                decision_data.get('exit_price'),
+                decision_data.get('pnl'),
+                decision_data.get('pnl_percent'),
+                decision_data.get('atr_14'),
+                decision_data.get('sma_50'),
+                decision_data.get('high_water_mark'),
+                decision_data.get('env_bias'),
+                decision_data.get('macro_reason'),
+                decision_data.get('weighted_score'),
+                int(time.time())
+            ))
+
+            row_id = c.lastrowid
+            _maybe_commit(conn)
+        _clear_read_caches()
         return row_id
     except Exception as e:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
         print(f"  ⚠️ DB WRITE FAILED: {e} — Decision: {decision_data.get('ticker')} {decision_data.get('action')}")
         return -1
 
 
+def bulk_log(decisions):
+    """Inserts many decision rows in ONE statement and transaction.
+
+    Where log_decision pays a connection + commit (fsync) per row, this
+    batches a whole plan run into a single multi-VALUES INSERT whose
+    RETURNING clause (SQLite >= 3.35, bundled with Python 3.11) yields
+    the row ids directly — no follow-up id query needed. Returns
+    [-1] * len(decisions) on failure, matching log_decision's -1 failure
+    sentinel.
+    """
+    if not decisions:
+        return []
+    try:
+        now_iso = datetime.datetime.now().isoformat()
+        now_epoch = int(time.time())
+        rows = [(
+            d.get('_timestamp', now_iso),
+            d.get('ticker'),
+            d.get('action'),
+            d.get('quantity', 0),
+            d.get('price'),
+            d.get('sentiment_score'),
+            d.get('duration_score', 0.0),
+            d.get('sentiment_reason', ''),
+            d.get('rsi_14'),
+            d.get('sma_20'),
+            d.get('decision_reason', ''),
+            d.get('entry_price'),
+            d.get('exit_price'),
+            d.get('pnl'),
+            d.get('pnl_percent'),
+            d.get('atr_14'),
+            d.get('sma_50'),
+            d.get('high_water_mark'),
+            d.get('env_bias'),
+            d.get('macro_reason'),
+            d.get('weighted_score'),
+            int(datetime.datetime.fromisoformat(d['_timestamp']).timestamp())
+            if '_timestamp' in d else now_epoch
+        ) for d in decisions]
+
+        conn = _get_conn()
+        # executemany can't carry RETURNING, so flatten into one
+        # multi-VALUES statement (22 params x a few dozen rows — far
+        # below SQLite's variable limit)
+        row_tpl = '(' + ', '.join(['?'] * 22) + ')'
+        with _WRITE_LOCK:
+            _begin(conn)
+            c = conn.execute('''
+                INSERT INTO history (
+                    timestamp, ticker, action, quantity, price,
+                    sentiment_score, duration_score, sentiment_reason, rsi_14, sma_20, decision_reason,
+                    entry_price, exit_price, pnl, pnl_percent,
+                    atr_14, sma_50, high_water_mark,
+                    env_bias, macro_reason,
+                    weighted_score, ts_epoch
+                ) VALUES ''' + ', '.join([row_tpl] * len(rows)) + ' RETURNING id',
+                [v for row in rows for v in row])
+            # RETURNING output order is documented as undefined; the
+            # single multi-VALUES INSERT assigns ascending rowids in
+            # VALUES order, so sorting restores the input mapping
+            ids = sorted(r[0] for r in c.fetchall())
+            _maybe_commit(conn)
+        _clear_read_caches()
+        return ids
+    except Exception as e:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        print(f"  ⚠️ DB BULK WRITE FAILED: {e} — {len(decisions)} decisions lost")
+        return [-1] * len(decisions)
+
+
 def update_execution(decision_id, order_id, status, filled_price=None, filled_qty=None, filled_at=None):
     """Called by trader.py after submitting/polling an order."""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    
-    c.execute('''
-        UPDATE history SET
-            order_id = ?,
-            execution_status = ?,
-            filled_price = ?,
-            filled_qty = ?,
-            filled_at = ?
-        WHERE id = ?
-    ''', (order_id, status, filled_price, filled_qty, filled_at, decision_id))
-    
-    conn.commit()
-    conn.close()
+    conn = _get_conn()
+    with _WRITE_LOCK:
+        _begin(conn)
+        conn.execute(_UPDATE_EXEC_SQL,
+                     (order_id, status, filled_price, filled_qty, filled_at, decision_id))
+        _maybe_commit(conn)
+
+
+def update_execution_many(rows):
+    """Applies many execution-status updates in one transaction.
+
+    rows: list of (order_id, status, filled_price, filled_qty, filled_at,
+    decision_id) tuples. trader.py buffers its submit/poll/skip updates
+    and lands each batch in a single commit instead of one per call.
+    """
+    if not rows:
+        return
+    conn = _get_conn()
+    with _WRITE_LOCK:
+        _begin(conn)
+        conn.executemany(_UPDATE_EXEC_SQL, rows)
+        _maybe_commit(conn)
 
 
 def update_outcome(decision_id, price_7d, price_14d, outcome_pnl_pct):
     """Called by outcome_tracker.py with ground-truth results."""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    
-    c.execute('''
-        UPDATE history SET
-            price_after_7d = ?,
-            price_after_14d = ?,
-            outcome_pnl_pct = ?
-        WHERE id = ?
-    ''', (price_7d, price_14d, outcome_pnl_pct, decision_id))
-    
-    conn.commit()
-    conn.close()
+    conn = _get_conn()
+    with _WRITE_LOCK:
+        _begin(conn)
+        conn.execute(_UPDATE_OUTCOME_SQL, (price_7d, price_14d, outcome_pnl_pct, decision_id))
+        _maybe_commit(conn)
+
+
+def update_outcomes_bulk(rows):
+    """Applies many outcome updates in one transaction.
+
+    rows: list of (price_7d, price_14d, outcome_pnl_pct, decision_id)
+    tuples. One executemany under a single commit costs one fsync total
+    instead of one per decision.
+    """
+    if not rows:
+        return
+    conn = _get_conn()
+    with _WRITE_LOCK:
+        _begin(conn)
+        conn.executemany(_UPDATE_OUTCOME_SQL, rows)
+        _maybe_commit(conn)
 
 
 def save_ai_review(decision_id, grade, feedback):
     """Called by strategy_reviewer.py to persist AI analysis."""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    
-    c.execute('''
-        UPDATE history SET
-            decision_grade = ?,
-            ai_feedback = ?
-        WHERE id = ?
-    ''', (grade, feedback, decision_id))
-    
-    conn.commit()
-    conn.close()
+    save_ai_reviews_bulk([(grade, feedback, decision_id)])
+
+
+def save_ai_reviews_bulk(rows):
+    """Persists many AI reviews in one transaction.
+
+    rows: list of (grade, feedback, decision_id) tuples — one commit
+    (one fsync) for the whole review instead of one per grade.
+    """
+    if not rows:
+        return
+    conn = _get_conn()
+    with _WRITE_LOCK:
+        _begin(conn)
+        conn.executemany(_SAVE_REVIEW_SQL, rows)
+        _maybe_commit(conn)
 
 
+@lru_cache(maxsize=512)
 def get_latest_scores(ticker):
-    """Retrieves the most recent (Sentiment, Duration) scores for a ticker."""
+    """Retrieves the most recent (Sentiment, Duration) scores for a ticker.
+
+    Memoized — callers hit this repeatedly for the same tickers within a
+    session, and every decision write clears the cache."""
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = _get_conn()
         c = conn.cursor()
         
         c.execute('''
@@ -226,7 +536,6 @@ def get_latest_scores(ticker):
         ''', (ticker,))
         
         result = c.fetchone()
-        conn.close()
         
         if result:
             return {'sentiment': result[0], 'duration': result[1] if result[1] is not None else 0.5}
@@ -238,22 +547,22 @@ def get_latest_scores(ticker):
 
 def get_pending_outcomes(days_threshold=14):
     """Returns BUY decisions older than `days_threshold` days that need outcome tracking."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = _get_conn()
     c = conn.cursor()
     
+    cutoff_epoch = int(time.time()) - days_threshold * 86400
     cutoff = (datetime.datetime.now() - datetime.timedelta(days=days_threshold)).isoformat()
-    
+
     c.execute('''
         SELECT id, ticker, timestamp, filled_price, filled_at FROM history
         WHERE action = 'BUY' 
           AND execution_status = 'filled'
           AND price_after_14d IS NULL
-          AND timestamp < ?
+          AND (ts_epoch < ? OR (ts_epoch IS NULL AND timestamp < ?))
         ORDER BY timestamp ASC
-    ''', (cutoff,))
+    ''', (cutoff_epoch, cutoff))
     
     rows = c.fetchall()
-    conn.close()
     
     return [{'id': r[0], 'ticker': r[1], 'timestamp': r[2], 
              'filled_price': r[3], 'filled_at': r[4]} for r in rows]
@@ -261,7 +570,7 @@ def get_pending_outcomes(days_threshold=14):
 
 def get_decisions_for_review():
     """Returns completed trades with 14-day outcomes for AI analysis."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = _get_conn()
     c = conn.cursor()
     
     c.execute('''
@@ -278,7 +587,6 @@ def get_decisions_for_review():
     ''')
     
     rows = c.fetchall()
-    conn.close()
     
     return [{
         'id': r[0], 'ticker': r[1], 'action': r[2], 'quantity': r[3],
@@ -289,79 +597,181 @@ def get_decisions_for_review():
     } for r in rows]
 
 
+# DB blacklist verdicts, cached per ticker. The cooldown window is
+# measured in days, so a short TTL can't flip a verdict mid-session;
+# decision writes clear the cache anyway via _clear_read_caches.
+_BLACKLIST_TTL = 300  # seconds
+_BLACKLIST_CACHE = {}  # ticker -> (expires_at, verdict)
+
+
 def is_blacklisted(ticker, current_bias=None):
     """Returns True if this ticker had a NEGATIVE exit in the last COOLDOWN_DAYS days.
     Reason-aware: Budget Trim and Slot Purge sells do NOT trigger blacklist.
     R4: News Override — if current_bias >= BLACKLIST_OVERRIDE_BIAS, override."""
-    # R4: News Override
+    # R4: News Override (pure logic — evaluated before the cache so an
+    # override never pollutes the stored DB verdict)
     if current_bias is not None and current_bias >= config.BLACKLIST_OVERRIDE_BIAS:
         return False
-    
+
+    cached = _BLACKLIST_CACHE.get(ticker)
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+
     # Sell reasons that are portfolio management, NOT negative signals about the ticker
     NON_NEGATIVE_PATTERNS = ('Budget Trim', 'Slot Purge', 'Partial Swap')
     
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = _get_conn()
         c = conn.cursor()
         
+        # Integer compare on ts_epoch; rows from before the v5 migration
+        # have a NULL epoch and fall back to the ISO string compare
+        cutoff_epoch = int(time.time()) - config.COOLDOWN_DAYS * 86400
         cutoff = (datetime.datetime.now() - datetime.timedelta(days=config.COOLDOWN_DAYS)).isoformat()
-        
+
         c.execute('''
             SELECT decision_reason FROM history
             WHERE ticker = ? 
               AND action = 'SELL'
-              AND timestamp > ?
+              AND (ts_epoch > ? OR (ts_epoch IS NULL AND timestamp > ?))
               AND (execution_status IS NULL OR execution_status NOT IN ('rejected', 'skipped_no_position'))
-        ''', (ticker, cutoff))
+        ''', (ticker, cutoff_epoch, cutoff))
         
         rows = c.fetchall()
-        conn.close()
         
         # Only count sells with negative reasons (ATR stop, trend breakdown, etc.)
+        verdict = False
         for (reason,) in rows:
             if reason and any(pat in reason for pat in NON_NEGATIVE_PATTERNS):
                 continue  # Skip portfolio management sells
-            return True  # Found a genuine negative exit
-        
-        return False
+            verdict = True  # Found a genuine negative exit
+            break
+
+        _BLACKLIST_CACHE[ticker] = (time.monotonic() + _BLACKLIST_TTL, verdict)
+        return verdict
     except Exception as e:
+        # Failures are never cached — the next call retries the query
         print(f"Error checking blacklist for {ticker}: {e}")
         return False
 
 
+def get_blacklisted_tickers(tickers):
+    """Batch form of is_blacklisted's DB verdict for a set of tickers.
+
+    One WHERE ticker IN (...) query replaces a probe per Buy candidate.
+    The R4 bias override stays with the caller — it depends on the
+    per-signal sentiment score, not on the database.
+    """
+    tickers = sorted({t for t in tickers if t})
+    if not tickers:
+        return set()
+
+    NON_NEGATIVE_PATTERNS = ('Budget Trim', 'Slot Purge', 'Partial Swap')
+
+    try:
+        conn = _get_conn()
+        cutoff_epoch = int(time.time()) - config.COOLDOWN_DAYS * 86400
+        cutoff = (datetime.datetime.now() - datetime.timedelta(days=config.COOLDOWN_DAYS)).isoformat()
+        placeholders = ','.join('?' * len(tickers))
+        c = conn.execute(f'''
+            SELECT ticker, decision_reason FROM history
+            WHERE ticker IN ({placeholders})
+              AND action = 'SELL'
+              AND (ts_epoch > ? OR (ts_epoch IS NULL AND timestamp > ?))
+              AND (execution_status IS NULL OR execution_status NOT IN ('rejected', 'skipped_no_position'))
+        ''', (*tickers, cutoff_epoch, cutoff))
+
+        blacklisted = set()
+        for ticker, reason in c.fetchall():
+            if reason and any(pat in reason for pat in NON_NEGATIVE_PATTERNS):
+                continue  # Portfolio management sell, not a negative exit
+            blacklisted.add(ticker)
+        return blacklisted
+    except Exception as e:
+        print(f"Error bulk-checking blacklist: {e}")
+        return set()
+
+
 def get_last_buy_time(ticker):
     """Returns the datetime of the most recent BUY for this ticker, or None."""
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = _get_conn()
         c = conn.cursor()
         
         c.execute('''
-            SELECT timestamp FROM history
+            SELECT timestamp, ts_epoch FROM history
             WHERE ticker = ? AND action = 'BUY'
             ORDER BY timestamp DESC LIMIT 1
         ''', (ticker,))
         
         result = c.fetchone()
-        conn.close()
         
         if result and result[0]:
-            ts = result[0]
-            if 'T' in str(ts):
-                return datetime.datetime.fromisoformat(str(ts))
-            else:
-                return datetime.datetime.strptime(str(ts)[:19], '%Y-%m-%d %H:%M:%S')
+            ts, epoch = result
+            if epoch is not None:
+                return datetime.datetime.fromtimestamp(epoch)
+            # Legacy rows were normalized to ISO form by the v6 migration
+            return datetime.datetime.fromisoformat(str(ts))
         return None
     except Exception as e:
         print(f"Error fetching last buy time for {ticker}: {e}")
         return None
 
 
+def get_ticker_state_bulk(tickers):
+    """Fetches per-ticker state for many tickers in ONE connection.
+
+    Fuses what get_last_buy_time + get_latest_scores would do as 2N
+    separate connect/prepare/fetch round-trips into two grouped queries.
+    Returns {ticker: {'last_buy': datetime|None, 'sentiment': float,
+    'duration': float}} with the same defaults as the per-ticker helpers.
+    Tickers with no history at all are present with last_buy=None and
+    zero scores, so callers can use plain dict lookups.
+    """
+    tickers = sorted({t for t in tickers if t})
+    state = {t: {'last_buy': None, 'sentiment': 0.0, 'duration': 0.0}
+             for t in tickers}
+    if not tickers:
+        return state
+
+    placeholders = ','.join('?' * len(tickers))
+    try:
+        conn = _get_conn()
+        c = conn.cursor()
+
+        c.execute(f'''
+            SELECT ticker, MAX(timestamp) FROM history
+            WHERE ticker IN ({placeholders}) AND action = 'BUY'
+            GROUP BY ticker
+        ''', tickers)
+        for ticker, ts in c.fetchall():
+            if not ts:
+                continue
+            state[ticker]['last_buy'] = datetime.datetime.fromisoformat(str(ts))
+
+        # SQLite bare-column semantics: with MAX(timestamp) in a GROUP BY,
+        # the other selected columns come from that same max row.
+        c.execute(f'''
+            SELECT ticker, sentiment_score, duration_score, MAX(timestamp)
+            FROM history
+            WHERE ticker IN ({placeholders}) AND sentiment_score IS NOT NULL
+            GROUP BY ticker
+        ''', tickers)
+        for ticker, sentiment, duration, _ in c.fetchall():
+            state[ticker]['sentiment'] = sentiment
+            state[ticker]['duration'] = duration if duration is not None else 0.5
+
+    except Exception as e:
+        print(f"Error bulk-fetching ticker state: {e}")
+    return state
+
+
 def get_high_water_mark(ticker):
     """Returns the most recent persisted high_water_mark for a ticker,
     scoped to the CURRENT position only (after the latest BUY).
     Prevents stale HWM from a closed position affecting a new re-entry."""
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = _get_conn()
         c = conn.cursor()
         
         # Find the most recent FILLED BUY timestamp for this ticker
@@ -374,7 +784,6 @@ def get_high_water_mark(ticker):
         buy_row = c.fetchone()
         
         if not buy_row:
-            conn.close()
             return None
         
         last_buy_ts = buy_row[0]
@@ -387,7 +796,6 @@ def get_high_water_mark(ticker):
             ORDER BY timestamp DESC LIMIT 1
         ''', (ticker, last_buy_ts))
         result = c.fetchone()
-        conn.close()
         return result[0] if result else None
     except Exception as e:
         print(f"Error fetching HWM for {ticker}: {e}")
@@ -401,7 +809,7 @@ def get_consecutive_elevated_days():
     Looks at the most recent RISK_SCALED records and counts backward until finding
     a session with env_bias >= 0.5."""
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = _get_conn()
         c = conn.cursor()
         c.execute('''
             SELECT timestamp, env_bias FROM history
@@ -409,7 +817,6 @@ def get_consecutive_elevated_days():
             ORDER BY timestamp DESC LIMIT 60
         ''')
         rows = c.fetchall()
-        conn.close()
 
         if not rows:
             return 0
@@ -432,7 +839,7 @@ def get_consecutive_elevated_days():
 def get_pending_scouts():
     """Returns scout positions awaiting validation (Pillar 5)."""
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = _get_conn()
         c = conn.cursor()
         c.execute('''
             SELECT id, ticker, weighted_score, scout_entry_score, timestamp
@@ -442,7 +849,6 @@ def get_pending_scouts():
             ORDER BY timestamp ASC
         ''')
         rows = c.fetchall()
-        conn.close()
         return [{
             'id': r[0], 'ticker': r[1],
             'weighted_score': r[2], 'scout_entry_score': r[3],
@@ -456,14 +862,14 @@ def get_pending_scouts():
 def mark_scout_state(ticker, new_state):
     """Update swap_state for a scout ticker. States: 'pending_complete', 'scout_failed'."""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        c.execute('''
-            UPDATE history SET swap_state = ?
-            WHERE ticker = ? AND swap_state = 'scout' AND action = 'BUY'
-        ''', (new_state, ticker))
-        conn.commit()
-        conn.close()
+        conn = _get_conn()
+        with _WRITE_LOCK:
+            _begin(conn)
+            conn.execute('''
+                UPDATE history SET swap_state = ?
+                WHERE ticker = ? AND swap_state = 'scout' AND action = 'BUY'
+            ''', (new_state, ticker))
+            _maybe_commit(conn)
     except Exception as e:
         print(f"Error updating scout state for {ticker}: {e}")
 
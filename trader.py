@@ -1,12 +1,22 @@
+import collections
 import json
 import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from alpaca.trading.client import TradingClient
 from alpaca.trading.requests import MarketOrderRequest, LimitOrderRequest
 from alpaca.trading.enums import OrderSide, TimeInForce
 import config
 import trade_logger
 
+try:
+    import orjson  # ~6x faster JSON codec; stdlib json is the fallback
+except ImportError:
+    orjson = None
+
+_json_loads = orjson.loads if orjson else json.loads
+
 def normalize_order_status(status):
     """Convert broker status (may be enum or string) to a plain lowercase string."""
     raw = getattr(status, "value", status)
@@ -14,9 +24,47 @@ def normalize_order_status(status):
         return "unknown"
     return str(raw).strip().lower()
 
+# Frozen view of one plan row — the loop reads fields by attribute
+# instead of re-probing the raw dict on every use
+Order = collections.namedtuple(
+    'Order', 'ticker action qty reason decision_id order_type limit_price price paired_sell')
+
+
+def _normalize_orders(orders_json):
+    """Validates and freezes the raw plan rows once, before processing.
+
+    Invalid rows (missing ticker, unknown action, non-positive or
+    unparseable quantity) drop out here instead of inside the worker
+    threads; action is lowercased once and quantity converted once.
+    """
+    normalized = []
+    for o in orders_json:
+        ticker = o.get('ticker')
+        action = str(o.get('action', '')).lower()
+        try:
+            qty = float(o.get('quantity') or 0)
+        except (TypeError, ValueError):
+            qty = 0.0
+        if not (ticker and action in ('buy', 'sell') and qty > 0):
+            print(f"⚠️ Skipping invalid order: {o}")
+            continue
+        normalized.append(Order(
+            ticker=ticker,
+            action=action,
+            qty=qty,
+            reason=o.get('reason', 'N/A'),
+            decision_id=o.get('decision_id'),  # From logic_engine
+            order_type=o.get('order_type', 'market'),
+            limit_price=o.get('limit_price'),
+            price=o.get('price'),
+            paired_sell=o.get('paired_sell_ticker'),
+        ))
+    return normalized
+
+
 def execute_trades():
     print("--- Starting Automated Trader ---")
-    
+
     # 1. Setup Alpaca Connection
     api_key = os.getenv("ALPACA_API_KEY", "REPLACE_WITH_YOUR_KEY")
     secret_key = os.getenv("ALPACA_SECRET_KEY", "REPLACE_WITH_YOUR_SECRET")
@@ -30,6 +78,9 @@ def execute_trades():
         account = client.get_account()
         print(f"✅ Connected to Alpaca. Account Status: {account.status}")
         print(f"   Buying Power: ${account.buying_power}")
+        # One get_all_positions call up front replaces a per-SELL
+        # get_open_position round-trip inside the loop
+        positions = {p.symbol: p for p in client.get_all_positions()}
     except Exception as e:
         print(f"❌ Connection Failed: {e}")
         return
@@ -40,8 +91,8 @@ def execute_trades():
     # 2. Load Execution Plan
     plan_file = 'execution_plan.json'
     try:
-        with open(plan_file, 'r') as f:
-            orders = json.load(f)
+        with open(plan_file, 'rb') as f:
+            orders = _json_loads(f.read())
     except FileNotFoundError:
         print(f"⚠️ No {plan_file} found. Run logic_engine.py first.")
         return
@@ -54,17 +105,23 @@ def execute_trades():
         return
 
     print(f"\nFound {len(orders)} orders in plan. Processing...")
+    orders = _normalize_orders(orders)
 
-    # --- Read Safe Hold state ---
+    # --- Read Safe Hold state + env-scaled minimum order value ---
+    # One parse serves both; the old code re-opened and re-parsed this
+    # file inside the loop for every single order
     safe_hold_mode = False
+    scaled_min_order_value = config.MIN_ORDER_VALUE
     try:
-        with open('sentiment_data.json', 'r') as f:
-            sentiment_data = json.load(f)
-            if sentiment_data.get('global_env_bias', 1.0) == 0.0:
-                safe_hold_mode = True
+        with open('sentiment_data.json', 'rb') as f:
+            sentiment_data = _json_loads(f.read())
+        env_bias = sentiment_data.get('global_env_bias', 1.0)
+        if env_bias == 0.0:
+            safe_hold_mode = True
+        scaled_min_order_value = config.MIN_ORDER_VALUE * env_bias
     except Exception:
         pass
-        
+
     if safe_hold_mode:
         print("🚨 SAFE HOLD MODE ACTIVE: trader.py will reject ALL BUY orders.")
 
@@ -72,189 +129,218 @@ def execute_trades():
     filled_sells = set()
     partially_filled_sells = {}  # ticker -> filled_qty for partial fills
 
-    # 3. Execute Orders
-    for order in orders:
-        ticker = order.get('ticker')
-        action = order.get('action') # 'buy' or 'sell'
-        qty = order.get('quantity')
-        reason = order.get('reason', 'N/A')
-        decision_id = order.get('decision_id')  # From logic_engine
+    # Execution-status updates are buffered and flushed in batches so a
+    # 30-order plan costs a handful of commits instead of ~60
+    pending_updates = []
+    updates_lock = threading.Lock()
 
-        if not (ticker and action and qty > 0):
-            print(f"⚠️ Skipping invalid order: {order}")
-            continue
-            
-        # --- SAFE HOLD MODE Enforcement ---
-        if action.lower() == 'buy':
-            if safe_hold_mode or 'BRAIN_OFFLINE_PROTECTION' in reason:
-                print(f"   🚨 SAFE HOLD MODE ACTIVE: Rejecting BUY order for {ticker}.")
-                if decision_id:
-                    trade_logger.update_execution(decision_id, None, 'rejected_safe_hold_mode')
-                continue
+    def queue_update(decision_id, order_id, status, filled_price=None, filled_qty=None, filled_at=None):
+        with updates_lock:
+            pending_updates.append((order_id, status, filled_price, filled_qty, filled_at, decision_id))
+            if len(pending_updates) >= 10:
+                trade_logger.update_execution_many(pending_updates)
+                pending_updates.clear()
 
-            # --- SELL-before-BUY Dependency Check ---
-            paired_sell = order.get('paired_sell_ticker')
-            if paired_sell and paired_sell not in filled_sells:
-                # Check if the paired SELL was partially filled (vs not filled at all)
-                partial_status = partially_filled_sells.get(paired_sell)
-                if partial_status:
-                    print(f"   🚫 DEPENDENCY BLOCK: Cannot BUY {ticker} — paired SELL of {paired_sell} only partially filled ({partial_status} shares).")
-                    if decision_id:
-                        trade_logger.update_execution(decision_id, None, 'deferred_sell_partial')
-                else:
-                    print(f"   🚫 DEPENDENCY BLOCK: Cannot BUY {ticker} — paired SELL of {paired_sell} did not fill.")
+    def _process_order(order):
+        # Status lines are buffered per order and emitted in one print, so
+        # worker output never interleaves (same pattern as logic_engine's
+        # status-line buffer)
+        lines = []
+        say = lines.append
+        try:
+            ticker = order.ticker
+            action = order.action  # normalized: 'buy' or 'sell'
+            qty = order.qty
+            reason = order.reason
+            decision_id = order.decision_id
+
+            # --- SAFE HOLD MODE Enforcement ---
+            if action == 'buy':
+                if safe_hold_mode or 'BRAIN_OFFLINE_PROTECTION' in reason:
+                    say(f"   🚨 SAFE HOLD MODE ACTIVE: Rejecting BUY order for {ticker}.")
                     if decision_id:
-                        trade_logger.update_execution(decision_id, None, 'skipped_sell_not_filled')
-                continue
+                        queue_update(decision_id, None, 'rejected_safe_hold_mode')
+                    return
+
+                # --- SELL-before-BUY Dependency Check ---
+                paired_sell = order.paired_sell
+                if paired_sell and paired_sell not in filled_sells:
+                    # Check if the paired SELL was partially filled (vs not filled at all)
+                    partial_status = partially_filled_sells.get(paired_sell)
+                    if partial_status:
+                        say(f"   🚫 DEPENDENCY BLOCK: Cannot BUY {ticker} — paired SELL of {paired_sell} only partially filled ({partial_status} shares).")
+                        if decision_id:
+                            queue_update(decision_id, None, 'deferred_sell_partial')
+                    else:
+                        say(f"   🚫 DEPENDENCY BLOCK: Cannot BUY {ticker} — paired SELL of {paired_sell} did not fill.")
+                        if decision_id:
+                            queue_update(decision_id, None, 'skipped_sell_not_filled')
+                    return
+
+            # --- P4: Force Whole-Integer Quantities ---
+            qty = int(qty)  # Floor to whole shares
+            if qty <= 0:
+                say(f"   ⚠️ Skipping: Qty rounds to 0 after flooring.")
+                if decision_id:
+                    queue_update(decision_id, None, 'skipped_qty_zero')
+                return
+
+            # P4: Minimum order value check (scaled by env_bias, computed
+            # once at session start)
+            est_price = order.limit_price or order.price or 0
+            order_value = qty * float(est_price)
+
+            if action == 'buy' and order_value < scaled_min_order_value:
+                say(f"   ⚠️ Skipping: Order value £{order_value:.0f} < min £{scaled_min_order_value:.0f}")
+                if decision_id:
+                    queue_update(decision_id, None, 'skipped_min_value')
+                return
+
+            say(f"\n📦 Preparing to {action.upper()} {qty} shares of {ticker}...")
+            say(f"   Reason: {reason}")
+
+            # --- Anti-Short-Selling Check (against the prefetched snapshot) ---
+            if action == 'sell':
+                position = positions.get(ticker)
+                current_qty = float(position.qty) if position is not None else 0.0
 
-        # --- P4: Force Whole-Integer Quantities ---
-        qty = int(qty)  # Floor to whole shares
-        if qty <= 0:
-            print(f"   ⚠️ Skipping: Qty rounds to 0 after flooring.")
-            if decision_id:
-                trade_logger.update_execution(decision_id, None, 'skipped_qty_zero')
-            continue
-        
-        # P4: Minimum order value check (Scaled by env_bias)
-        est_price = order.get('limit_price') or order.get('price') or 0
-        order_value = qty * float(est_price)
-        scaled_min_order_value = config.MIN_ORDER_VALUE
-        try:
-            with open('sentiment_data.json', 'r') as f:
-                s_data = json.load(f)
-                scaled_min_order_value = config.MIN_ORDER_VALUE * s_data.get('global_env_bias', 1.0)
-        except Exception:
-            pass
-            
-        if action.lower() == 'buy' and order_value < scaled_min_order_value:
-            print(f"   ⚠️ Skipping: Order value £{order_value:.0f} < min £{scaled_min_order_value:.0f}")
-            if decision_id:
-                trade_logger.update_execution(decision_id, None, 'skipped_min_value')
-            continue
-        
-        print(f"\n📦 Preparing to {action.upper()} {qty} shares of {ticker}...")
-        print(f"   Reason: {reason}")
-        
-        # --- Anti-Short-Selling Check ---
-        if action == 'sell':
-            try:
-                position = client.get_open_position(ticker)
-                current_qty = float(position.qty)
-                
                 if current_qty <= 0:
-                    print(f"   ⚠️ Skipping SELL: No long position for {ticker} (Qty: {current_qty}).") 
+                    say(f"   ⚠️ Skipping SELL: No long position for {ticker} (Qty: {current_qty}).")
                     if decision_id:
-                        trade_logger.update_execution(decision_id, None, 'skipped_no_position')
-                    continue
-                
+                        queue_update(decision_id, None, 'skipped_no_position')
+                    return
+
                 if qty > current_qty:
-                    print(f"   ⚠️ Adjusted SELL qty from {qty} to {current_qty} (Capped at Max Available).")
+                    say(f"   ⚠️ Adjusted SELL qty from {qty} to {current_qty} (Capped at Max Available).")
                     qty = current_qty
 
-            except Exception as e:
-                print(f"   ⚠️ Skipping SELL: No existing position for {ticker} found in Alpaca.")
-                if decision_id:
-                    trade_logger.update_execution(decision_id, None, 'skipped_no_position')
-                continue
-
-        # --- Submit Order ---
-        try:
-            order_type = order.get('order_type', 'market')
-            limit_price = order.get('limit_price')
-            side = OrderSide.BUY if action.lower() == 'buy' else OrderSide.SELL
-            
-            # P4: All orders are whole-share limit orders
-            if order_type == 'limit' and limit_price:
-                # PATCH B: Dynamic Limit Price Buffer
-                # SELL: 0.5% below market → ensures fill in falling market
-                # BUY: 0.5% above market → ensures fill in rising market
-                if action == 'sell':
-                    limit_price = round(float(limit_price) * 0.995, 2)
-                else:
-                    limit_price = round(float(limit_price) * 1.005, 2)
-                print(f"   🔒 Limit Order: ${limit_price:.2f} ({'↓0.5% buffer' if action == 'sell' else '↑0.5% buffer'})")
-                order_request = LimitOrderRequest(
-                    symbol=ticker,
-                    qty=float(qty),
-                    side=side,
-                    time_in_force=TimeInForce.DAY,
-                    limit_price=limit_price
-                )
-            else:
-                print(f"   📊 Market Order: {qty} shares")
-                order_request = MarketOrderRequest(
-                    symbol=ticker,
-                    qty=float(qty),
-                    side=side,
-                    time_in_force=TimeInForce.DAY
-                )
-
-            submitted_order = client.submit_order(order_request)
-            alpaca_order_id = str(submitted_order.id)
-            print(f"   🚀 Order Submitted! ID: {alpaca_order_id}")
-            print(f"      Status: {normalize_order_status(submitted_order.status)}")
-            
-            # --- Log Submission ---
-            if decision_id:
-                trade_logger.update_execution(decision_id, alpaca_order_id, 'submitted')
-            
-            # --- 5-Second Polling for Fill ---
-            print(f"   ⏳ Waiting 5s for fill confirmation...")
-            time.sleep(5)
-            
+            # --- Submit Order ---
             try:
-                updated_order = client.get_order_by_id(alpaca_order_id)
-                raw_status = updated_order.status
-                fill_status = normalize_order_status(raw_status)
-                print(f"   📋 Order Status: {fill_status} (raw: {raw_status})")
-                
-                if fill_status == 'filled':
-                    filled_price = float(updated_order.filled_avg_price) if updated_order.filled_avg_price else None
-                    filled_qty = float(updated_order.filled_qty) if updated_order.filled_qty else None
-                    filled_at = str(updated_order.filled_at) if updated_order.filled_at else None
-                    
-                    print(f"   ✅ FILLED: {filled_qty} shares @ ${filled_price:.2f}")
-                    
-                    if decision_id:
-                        trade_logger.update_execution(
-                            decision_id, alpaca_order_id, 'filled',
-                            filled_price, filled_qty, filled_at
-                        )
-                    # Track filled sell for replacement dependency
+                order_type = order.order_type
+                limit_price = order.limit_price
+                side = OrderSide.BUY if action == 'buy' else OrderSide.SELL
+
+                # P4: All orders are whole-share limit orders
+                if order_type == 'limit' and limit_price:
+                    # PATCH B: Dynamic Limit Price Buffer
+                    # SELL: 0.5% below market → ensures fill in falling market
+                    # BUY: 0.5% above market → ensures fill in rising market
                     if action == 'sell':
-                        filled_sells.add(ticker)
-                elif fill_status in ('partially_filled', 'partial_fill'):
-                    filled_price = float(updated_order.filled_avg_price) if updated_order.filled_avg_price else None
-                    filled_qty = float(updated_order.filled_qty) if updated_order.filled_qty else None
-                    print(f"   ⚠️ PARTIAL FILL: {filled_qty} shares @ ${filled_price}")
-                    
-                    if decision_id:
-                        trade_logger.update_execution(
-                            decision_id, alpaca_order_id, 'partial_fill',
-                            filled_price, filled_qty
-                        )
-                    # Track partial sells for dependency logging
-                    if action == 'sell' and filled_qty:
-                        partially_filled_sells[ticker] = filled_qty
-                elif fill_status in ('cancelled', 'expired', 'rejected'):
-                    print(f"   ❌ Order {fill_status.upper()}")
-                    if decision_id:
-                        trade_logger.update_execution(decision_id, alpaca_order_id, fill_status)
+                        limit_price = round(float(limit_price) * 0.995, 2)
+                    else:
+                        limit_price = round(float(limit_price) * 1.005, 2)
+                    say(f"   🔒 Limit Order: ${limit_price:.2f} ({'↓0.5% buffer' if action == 'sell' else '↑0.5% buffer'})")
+                    order_request = LimitOrderRequest(
+                        symbol=ticker,
+                        qty=float(qty),
+                        side=side,
+                        time_in_force=TimeInForce.DAY,
+                        limit_price=limit_price
+                    )
                 else:
-                    # Still pending (accepted, pending_new, etc.)
-                    print(f"   ⏳ Order still pending: {fill_status}")
-                    if decision_id:
-                        trade_logger.update_execution(decision_id, alpaca_order_id, fill_status)
-                        
-            except Exception as poll_err:
-                print(f"   ⚠️ Could not poll order status: {poll_err}")
-            
-        except Exception as e:
-            print(f"   ❌ Order Failed: {e}")
-            if decision_id:
-                trade_logger.update_execution(decision_id, None, 'rejected')
-
-        time.sleep(1) # Rate limit politeness
+                    say(f"   📊 Market Order: {qty} shares")
+                    order_request = MarketOrderRequest(
+                        symbol=ticker,
+                        qty=float(qty),
+                        side=side,
+                        time_in_force=TimeInForce.DAY
+                    )
+
+                submitted_order = client.submit_order(order_request)
+                alpaca_order_id = str(submitted_order.id)
+                say(f"   🚀 Order Submitted! ID: {alpaca_order_id}")
+                say(f"      Status: {normalize_order_status(submitted_order.status)}")
+
+                # --- Log Submission ---
+                if decision_id:
+                    queue_update(decision_id, alpaca_order_id, 'submitted')
+
+                # --- Fill Polling: short back-off instead of a flat 5s
+                # sleep. Liquid market orders fill in well under a second,
+                # so most orders exit on the first probe; terminal statuses
+                # break out immediately and the worst case stays under 5s. ---
+                try:
+                    for delay in (0.2, 0.3, 0.5, 1.0, 2.0):
+                        time.sleep(delay)
+                        updated_order = client.get_order_by_id(alpaca_order_id)
+                        raw_status = updated_order.status
+                        fill_status = normalize_order_status(raw_status)
+                        if fill_status in ('filled', 'rejected', 'cancelled', 'expired'):
+                            break
+                    say(f"   📋 Order Status: {fill_status} (raw: {raw_status})")
+
+                    if fill_status == 'filled':
+                        filled_price = float(updated_order.filled_avg_price) if updated_order.filled_avg_price else None
+                        filled_qty = float(updated_order.filled_qty) if updated_order.filled_qty else None
+                        filled_at = str(updated_order.filled_at) if updated_order.filled_at else None
+
+                        say(f"   ✅ FILLED: {filled_qty} shares @ ${filled_price:.2f}")
+
+                        if decision_id:
+                            queue_update(
+                                decision_id, alpaca_order_id, 'filled',
+                                filled_price, filled_qty, filled_at
+                            )
+                        # Track filled sell for replacement dependency
+                        if action == 'sell':
+                            filled_sells.add(ticker)
+                    elif fill_status in ('partially_filled', 'partial_fill'):
+                        filled_price = float(updated_order.filled_avg_price) if updated_order.filled_avg_price else None
+                        filled_qty = float(updated_order.filled_qty) if updated_order.filled_qty else None
+                        say(f"   ⚠️ PARTIAL FILL: {filled_qty} shares @ ${filled_price}")
+
+                        if decision_id:
+                            queue_update(
+                                decision_id, alpaca_order_id, 'partial_fill',
+                                filled_price, filled_qty
+                            )
+                        # Track partial sells for dependency logging
+                        if action == 'sell' and filled_qty:
+                            partially_filled_sells[ticker] = filled_qty
+                    elif fill_status in ('cancelled', 'expired', 'rejected'):
+                        say(f"   ❌ Order {fill_status.upper()}")
+                        if decision_id:
+                            queue_update(decision_id, alpaca_order_id, fill_status)
+                    else:
+                        # Still pending (accepted, pending_new, etc.)
+                        say(f"   ⏳ Order still pending: {fill_status}")
+                        if decision_id:
+                            queue_update(decision_id, alpaca_order_id, fill_status)
+
+                except Exception as poll_err:
+                    say(f"   ⚠️ Could not poll order status: {poll_err}")
+
+            except Exception as e:
+                say(f"   ❌ Order Failed: {e}")
+                if decision_id:
+                    queue_update(decision_id, None, 'rejected')
+        finally:
+            if lines:
+                print('\n'.join(lines), flush=True)
+
+    # 3. Execute Orders — SELLs first, then BUYs, so the sell-before-buy
+    # dependency gate sees every sell outcome before any buy is weighed.
+    # Within each phase orders are independent I/O waits (REST submit +
+    # fill poll), so a small pool runs them concurrently; four workers
+    # stay far below Alpaca's paper-API rate limits, which is also why
+    # the old per-order politeness sleep is gone. The session-wide
+    # transaction means the batched update flushes still cost one fsync
+    # at end_session().
+    sells = [o for o in orders if o.action == 'sell']
+    buys = [o for o in orders if o.action == 'buy']
+
+    trade_logger.begin_session()
+    try:
+        for phase in (sells, buys):
+            if not phase:
+                continue
+            with ThreadPoolExecutor(max_workers=min(4, len(phase))) as ex:
+                list(ex.map(_process_order, phase))
+    finally:
+        with updates_lock:
+            trade_logger.update_execution_many(pending_updates)
+            pending_updates.clear()
+        trade_logger.end_session()
 
     print("\n--- Trading Session Complete ---")
     trade_logger.backup_db()
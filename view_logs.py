@@ -3,28 +3,31 @@ from trade_logger import DB_FILE
 
 def view_logs(limit=5):
     conn = sqlite3.connect(DB_FILE)
+    conn.row_factory = sqlite3.Row  # name-based access instead of positional unpacking
     c = conn.cursor()
-    
+
     try:
         c.execute('''
-            SELECT id, timestamp, ticker, action, quantity, price, decision_reason 
-            FROM history 
-            ORDER BY id DESC 
+            SELECT id, timestamp, ticker, action, quantity, price, decision_reason
+            FROM history
+            ORDER BY id DESC
             LIMIT ?
         ''', (limit,))
-        
-        rows = c.fetchall()
-        
-        if not rows:
-            print("No logs found.")
-            return
 
-        print(f"\n--- Last {len(rows)} Decisions ---")
-        for row in rows:
-            print(f"[{row[1]}] {row[3]} {row[2]} (Qty: {row[4]} @ ${row[5]})", flush=True)
-            print(f"   Reason: {row[6]}", flush=True)
+        # Stream straight off the cursor — no fetchall buffer, so a large
+        # limit doesn't materialize the whole result set up front
+        shown = 0
+        for row in c:
+            if shown == 0:
+                print("\n--- Recent Decisions ---")
+            print(f"[{row['timestamp']}] {row['action']} {row['ticker']} (Qty: {row['quantity']} @ ${row['price']})", flush=True)
+            print(f"   Reason: {row['decision_reason']}", flush=True)
             print("-" * 40, flush=True)
-            
+            shown += 1
+
+        if shown == 0:
+            print("No logs found.")
+
     except sqlite3.Error as e:
         print(f"Error accessing database: {e}")
     finally: